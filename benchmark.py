@@ -0,0 +1,301 @@
+"""Headless benchmarks for the balance board pipeline stages.
+
+Drives the real decode, filter, frame and output code from wiibalance.py
+with generated input, and reports throughput plus per-call latency
+percentiles for each stage. Results can be written as JSON and compared
+against an earlier run:
+
+    python benchmark.py --json before.json
+    python benchmark.py --json after.json --compare before.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import wiibalance as wb  # noqa: E402
+
+
+class _StubUinputDevice:
+    def __init__(self):
+        self.events = 0
+
+    def emit(self, event, value, syn=True):
+        self.events += 1
+
+    def syn(self):
+        pass
+
+    def destroy(self):
+        pass
+
+
+class _StubVJoy:
+    def __init__(self):
+        self.calls = 0
+
+    def set_axis(self, axis, value):
+        self.calls += 1
+
+    def set_button(self, button, value):
+        self.calls += 1
+
+
+def _percentile(sorted_vals, pct):
+    idx = min(len(sorted_vals) - 1, int(round(pct / 100.0 * (len(sorted_vals) - 1))))
+    return sorted_vals[idx]
+
+
+def measure(inputs, fn, repeat=3):
+    """Time ``fn(item)`` for every item: per-call latency plus bulk throughput."""
+    perf = time.perf_counter_ns
+    latencies = []
+    for item in inputs:
+        t0 = perf()
+        fn(item)
+        latencies.append(perf() - t0)
+    latencies.sort()
+
+    best = None
+    for _ in range(repeat):
+        t0 = perf()
+        for item in inputs:
+            fn(item)
+        elapsed = perf() - t0
+        best = elapsed if best is None else min(best, elapsed)
+
+    return {
+        "calls": len(inputs),
+        "ops_per_s": round(len(inputs) / (best / 1e9), 1),
+        "p50_us": round(_percentile(latencies, 50) / 1000.0, 3),
+        "p90_us": round(_percentile(latencies, 90) / 1000.0, 3),
+        "p99_us": round(_percentile(latencies, 99) / 1000.0, 3),
+        "max_us": round(latencies[-1] / 1000.0, 3),
+    }
+
+
+def _wiimote_reports(n):
+    fake = wb.FakeWiimote(rate_hz=1e9)
+    fake._t0 -= 3.0  # the rider is already standing, so frames are active and move the axes
+    fake.write(wb._pad_report([0x12, 0x04, 0x34]))
+    return [fake.read(64) for _ in range(n)]
+
+
+def _evdev_events(n):
+    backend = wb.SyntheticBackend(rate_hz=100.0)
+    events = []
+    for i in range(n):
+        events.extend(backend._events(i / 100.0))
+    return events
+
+
+def _frames(n, state=None):
+    state = state or wb.BoardState()
+    reports = _wiimote_reports(n)
+    tables = wb._compile_calibration(wb.FakeWiimote.CALIBRATION)
+    frames = []
+    for i, report in enumerate(reports):
+        _, tl, tr, bl, br = wb._decode_balance_report(report)
+        state.raw[:] = [tables[0][tl], tables[1][tr], tables[2][bl], tables[3][br]]
+        frames.append(state.process_sample(i / 100.0))
+    return frames
+
+
+def bench_decode(n):
+    backend = wb.HidapiBackend()
+    backend._tables = wb._compile_calibration(wb.FakeWiimote.CALIBRATION)
+    decode = backend.decode
+
+    def run(report):
+        _, tl, tr, bl, br = wb._decode_balance_report(report)
+        decode(tl, tr, bl, br)
+
+    return measure(_wiimote_reports(n), run)
+
+
+def bench_evdev(n):
+    feed = wb.EvdevFrameAssembler().feed
+    return measure(_evdev_events(n), lambda ev: feed(ev[0], ev[1], ev[2], 0.0))
+
+
+def bench_filter(n):
+    state = wb.BoardState()
+    return measure(range(n), lambda i: state.update_filtered(i / 100.0))
+
+
+def bench_frame(n):
+    state = wb.BoardState()
+    _frames(64, state)  # settle the filter on a loaded board
+    ticks = itertools.count(64)  # 100 Hz timestamps that keep rising across repeats
+    return measure(range(n), lambda _: state.build_frame(next(ticks) / 100.0))
+
+
+def bench_uinput(n):
+    sink = wb.UinputSink(device=_StubUinputDevice())
+    return measure(_frames(n), sink.emit)
+
+
+def bench_vjoy(n):
+    sink = wb.VJoySink(joystick=_StubVJoy())
+    return measure(_frames(n), sink.emit)
+
+
+def bench_stream(n):
+    # Nobody reads the socket; the kernel discards datagrams once its buffer fills.
+    sink = wb.UdpStreamSink([("127.0.0.1", 9)])
+    try:
+        return measure(_frames(n), sink.emit)
+    finally:
+        sink.close()
+
+
+def bench_shm(n):
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sink = wb.ShmRingSink(os.path.join(tmp, "bench.ring"))
+        try:
+            return measure(_frames(n), sink.emit)
+        finally:
+            sink.close()
+
+
+def bench_sway(n):
+    # A rider standing on the board, so every frame enters the window.
+    rider = wb.SimulatedRider(cycle_s=1e9, seed=1)
+    state = wb.BoardState()
+    frames = []
+    for i in range(n):
+        t = 2.0 + i / 100.0
+        _, kg = rider.sample(t)
+        state.raw[:] = [v * 2.20462 for v in kg]
+        frames.append(state.process_sample(t))
+    analyzer = wb.SwayAnalyzer(window_s=10.0)
+    return measure(frames, analyzer.emit, repeat=1)
+
+
+def bench_gestures(n):
+    frames = _frames(n)
+    update = wb.GestureDetector().update
+    return measure(frames, lambda f: update(f.timestamp, f.total, f.cop_x, f.cop_y), repeat=1)
+
+
+def bench_pipeline(n):
+    """Report in, joystick update out, exactly as start_board_reader does it."""
+    backend = wb.HidapiBackend()
+    backend._tables = wb._compile_calibration(wb.FakeWiimote.CALIBRATION)
+    sink = wb.UinputSink(device=_StubUinputDevice())
+    state = wb.BoardState()
+    decode = backend.decode
+    ticks = itertools.count()  # 100 Hz timestamps that keep rising across repeats
+
+    def run(report):
+        _, tl, tr, bl, br = wb._decode_balance_report(report)
+        state.raw[:] = decode(tl, tr, bl, br)
+        sink.emit(state.process_sample(next(ticks) / 100.0))
+
+    return measure(_wiimote_reports(n), run)
+
+
+def bench_draw(n):
+    pygame = wb._import_pygame()
+    pygame.init()
+    screen = pygame.display.set_mode((700, 650))
+    font = pygame.font.SysFont("Segoe UI", 24)
+    specs = [{"label": "Tare", "action": "tare"}, {"label": "Exact Mode", "action": "exact"}]
+    layout = wb._layout_buttons(*screen.get_size(), font, specs)
+    frames = _frames(n)
+
+    def run(frame):
+        wb.boards[0].frame = frame
+        wb.draw_board(screen, font, layout, (0, 0))
+
+    try:
+        return measure(frames, run, repeat=1)
+    finally:
+        pygame.quit()
+
+
+STAGES = {
+    "wiimote_decode": bench_decode,
+    "evdev_events": bench_evdev,
+    "filter": bench_filter,
+    "frame_cop": bench_frame,
+    "uinput_emit": bench_uinput,
+    "vjoy_emit": bench_vjoy,
+    "udp_stream_emit": bench_stream,
+    "shm_ring_emit": bench_shm,
+    "sway_update": bench_sway,
+    "gesture_detect": bench_gestures,
+    "pipeline": bench_pipeline,
+    "draw_board": bench_draw,
+}
+
+
+def _git_revision():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)["stages"]
+    print(f"\nvs {baseline_path}:")
+    for name, cur in results.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        speedup = cur["ops_per_s"] / old["ops_per_s"] if old["ops_per_s"] else float("inf")
+        print(f"{name:<16} {speedup:>6.2f}x throughput   p99 {old['p99_us']:.2f} -> {cur['p99_us']:.2f} us")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=20000, help="calls per stage")
+    parser.add_argument("--draw-samples", type=int, default=300, help="frames for draw_board")
+    parser.add_argument("--stage", action="append", choices=sorted(STAGES), help="run only these stages")
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="compare against an earlier JSON result")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.stage or STAGES:
+        n = args.draw_samples if name == "draw_board" else args.samples
+        result = results[name] = STAGES[name](n)
+        print(
+            f"{name:<16} {result['ops_per_s']:>12,.0f}/s   p50 {result['p50_us']:>8.2f} us"
+            f"   p99 {result['p99_us']:>8.2f} us   max {result['max_us']:>9.2f} us"
+        )
+
+    report = {
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "stages": results,
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
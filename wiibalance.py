@@ -1,17 +1,32 @@
+import argparse
+import atexit
+from array import array
+import collections
+import itertools
+import logging
+import math
+import mmap
+import os
 import platform
+import random
+import select
+import selectors
+import signal
+import struct
 import sys
 import threading
 import time
 
-import pygame
+# pygame (visualizer) and NumPy (batch decoding) are imported on first use so
+# that a headless joystick bridge never pays for loading them.
+pygame = None
+
+log = logging.getLogger("wiibalance")
 
-raw_data = [0.0, 0.0, 0.0, 0.0]  # TL, TR, BL, BR
-filtered_raw = [0.0, 0.0, 0.0, 0.0]
-aButton = False
-tare_offset = [0.0, 0.0, 0.0, 0.0]
 exact_mode = False
 NOISE_FLOOR_LBS = 0.01       # drop tiny sensor drift in normal mode
 NOISE_FLOOR_LBS_EXACT = 0.0001  # lighter floor in exact mode to keep precision
+IDLE_WEIGHT_LBS = 5.0  # below this (damped mode) the joystick stays centered
 TARE_STEP = 0.1  # per-click tare adjustment in lbs
 SMOOTH_ALPHA = 0.25  # 0=no smoothing, 1=no memory
 
@@ -23,391 +38,2851 @@ TEXT_COLOR = (240, 240, 240)
 BTN_COLOR = (60, 80, 120)
 BTN_COLOR_HOVER = (90, 120, 170)
 BTN_COLOR_ACTIVE = (120, 170, 80)
+STABLE_COLOR = (120, 220, 120)
+
+
+class Frame:
+    """Immutable snapshot of one processed board sample.
+
+    The reader thread builds a new Frame per sample and publishes it by
+    rebinding its board's ``BoardState.frame``. A reference swap is atomic
+    under the GIL, so every consumer sees either the old or the new frame,
+    never a mix.
+    """
+
+    __slots__ = (
+        "timestamp",
+        "raw",
+        "weights",
+        "total",
+        "cop_x",
+        "cop_y",
+        "active",
+        "button",
+        "board",
+        "gestures",
+        "settled",
+    )
+
+    def __init__(self, timestamp, raw, weights, total, cop_x, cop_y, active, button, board=0, gestures=0, settled=0.0):
+        self.timestamp = timestamp
+        self.raw = raw  # unfiltered lbs, used for taring
+        self.weights = weights  # filtered, tared, noise-floored lbs (TL, TR, BL, BR)
+        self.total = total
+        self.cop_x = cop_x  # -1 (left) .. 1 (right)
+        self.cop_y = cop_y  # -1 (bottom) .. 1 (top)
+        self.active = active  # someone is on the board; CoP is meaningful
+        self.button = button
+        self.board = board  # index of the board that produced it
+        self.gestures = gestures  # GESTURE_BITS currently signalled
+        self.settled = settled  # locked-in total weight once it is steady, else 0.0
+
+
+### --- Filtering ---
+# Filters take per-sample timestamps (seconds), so their smoothing is the
+# same whether the board delivers 60 Hz, 100 Hz or a replay runs at max
+# speed. Weight filters update a 4-value list in place; CoP filters map a
+# measured (x, y) to a filtered one.
+MAX_FILTER_DT = 1.0  # a longer gap restarts the filter instead of blending
+
+
+class EmaFilter:
+    """Exponential moving average with ``alpha`` defined per 1/reference_hz seconds."""
+
+    def __init__(self, alpha=SMOOTH_ALPHA, reference_hz=100.0):
+        self.alpha = alpha
+        self.reference_hz = reference_hz
+        self.last_t = None
+
+    def update(self, t, values, out):
+        if self.last_t is None or not 0.0 <= t - self.last_t <= MAX_FILTER_DT:
+            out[:] = values
+        else:
+            a = 1.0 - (1.0 - self.alpha) ** ((t - self.last_t) * self.reference_hz)
+            for i in range(4):
+                out[i] += a * (values[i] - out[i])
+        self.last_t = t
+
+
+class OneEuroFilter:
+    """One Euro filter (Casiez et al.): heavy smoothing at rest, little lag when moving.
+
+    The cutoff frequency rises with the filtered speed of each channel, so
+    jitter is suppressed while standing still but fast weight shifts pass
+    through almost unfiltered.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.05, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff  # Hz at rest
+        self.beta = beta  # extra Hz per lb/s of movement
+        self.d_cutoff = d_cutoff
+        self.last_t = None
+        self.speed = [0.0, 0.0, 0.0, 0.0]
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2.0 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def update(self, t, values, out):
+        if self.last_t is None or not 0.0 <= t - self.last_t <= MAX_FILTER_DT:
+            out[:] = values
+            self.speed[:] = (0.0, 0.0, 0.0, 0.0)
+            self.last_t = t
+            return
+        dt = max(t - self.last_t, 1e-4)
+        self.last_t = t
+        a_d = self._alpha(self.d_cutoff, dt)
+        speed = self.speed
+        for i in range(4):
+            speed[i] += a_d * ((values[i] - out[i]) / dt - speed[i])
+            a = self._alpha(self.min_cutoff + self.beta * abs(speed[i]), dt)
+            out[i] += a * (values[i] - out[i])
+
+
+class KalmanCopFilter:
+    """Constant-velocity Kalman filter on the centre of pressure, one per axis.
+
+    ``accel_noise`` is how hard the rider can change CoP velocity (units of
+    board half-widths per s^2); ``measurement_noise`` is the CoP jitter
+    variance. The velocity state lets the estimate keep up with a lean
+    instead of trailing it like an average.
+    """
+
+    def __init__(self, accel_noise=20.0, measurement_noise=0.002):
+        self.q = accel_noise
+        self.r = measurement_noise
+        self.last_t = None
+        self.state = None  # per axis: [pos, vel, p00, p01, p11]
+
+    def reset(self):
+        self.last_t = None
+        self.state = None
+
+    def _step(self, s, z, dt):
+        pos, vel, p00, p01, p11 = s
+        # Predict
+        pos += vel * dt
+        q = self.q
+        p00 += dt * (2 * p01 + dt * p11) + q * dt**4 / 4
+        p01 += dt * p11 + q * dt**3 / 2
+        p11 += q * dt * dt
+        # Update with the measured position
+        k0 = p00 / (p00 + self.r)
+        k1 = p01 / (p00 + self.r)
+        innovation = z - pos
+        s[0] = pos + k0 * innovation
+        s[1] = vel + k1 * innovation
+        s[2] = (1 - k0) * p00
+        s[3] = (1 - k0) * p01
+        s[4] = p11 - k1 * p01
+        return s[0]
+
+    def update(self, t, x, y):
+        if self.state is None or not 0.0 <= t - self.last_t <= MAX_FILTER_DT:
+            self.state = ([x, 0.0, self.r, 0.0, 1.0], [y, 0.0, self.r, 0.0, 1.0])
+            self.last_t = t
+            return x, y
+        dt = max(t - self.last_t, 1e-4)
+        self.last_t = t
+        return self._step(self.state[0], x, dt), self._step(self.state[1], y, dt)
+
+
+# name -> (weight filter factory, CoP filter factory or None)
+FILTER_PROFILES = {
+    "ema": (EmaFilter, None),
+    "one-euro": (OneEuroFilter, None),
+    "kalman": (lambda: EmaFilter(alpha=0.6), KalmanCopFilter),
+}
+filter_profile = {False: "one-euro", True: "ema"}  # exact_mode -> profile name
+
+
+### --- Gestures ---
+# Whole-body gestures recognised from the frame stream, one sample at a
+# time. Momentary gestures (stepping on, a jump) are reported as a short
+# pulse; leans are held for as long as they last. Each gesture is one bit
+# of Frame.gestures and maps to one extra joystick button.
+GESTURES = (
+    "step_on",
+    "step_off",
+    "jump",
+    "squat",
+    "lean_left",
+    "lean_right",
+    "lean_forward",
+    "lean_back",
+    "shift_left",
+    "shift_right",
+)
+GESTURE_BITS = {name: 1 << i for i, name in enumerate(GESTURES)}
+GESTURE_DEFAULTS = {
+    "on_lbs": 15.0,  # step on above this total...
+    "off_lbs": 8.0,  # ...and off below this one
+    "off_s": 0.8,  # unloaded for longer than this is a step off, shorter is a jump
+    "settle_s": 0.5,  # after stepping on, wait this long before taking body weight
+    "dip": 0.8,  # squat/jump countermovement: total below this fraction of body weight
+    "recover": 1.05,  # squat: back above this fraction...
+    "squat_s": 1.5,  # ...within this long after the dip
+    "confirm_s": 0.15,  # no take-off this long after recovering confirms a squat
+    "unload": 0.25,  # jump: airborne below this fraction of body weight
+    "land": 1.3,  # jump: landing spike above this fraction
+    "air_s": 0.8,  # longest flight still counted as a jump
+    "quiet_s": 0.5,  # after a jump or squat, ignore the settling oscillation
+    "lean_on": 0.45,  # CoP beyond this (-1..1) starts a lean...
+    "lean_off": 0.3,  # ...which ends back inside this
+    "lean_s": 0.1,  # lean must last this long
+    "shift": 0.3,  # weight shift: CoP x from beyond -shift to beyond +shift...
+    "shift_s": 0.4,  # ...within this long
+    "pulse_s": 0.1,  # how long momentary gestures hold their button
+}
+_QUIET, _DIP, _PUSH, _AIR = range(4)  # jump/squat phases
+
+
+class GestureDetector:
+    """Incremental gesture recognition with hysteresis; update() is O(1) per sample.
+
+    Thresholds default to GESTURE_DEFAULTS; pass keyword overrides. Jump and
+    squat are judged relative to a body weight baseline taken after
+    stepping on and tracked slowly while standing still. A squat is
+    confirmed ``confirm_s`` after its recovery, since a jump starts with
+    the same dip and push; a jump is reported on landing.
+    """
+
+    LEAN_BITS = tuple(GESTURE_BITS[f"lean_{d}"] for d in ("left", "right", "forward", "back"))
+
+    def __init__(self, **thresholds):
+        unknown = set(thresholds) - set(GESTURE_DEFAULTS)
+        if unknown:
+            raise ValueError(f"unknown gesture thresholds: {', '.join(sorted(unknown))}")
+        for name, value in {**GESTURE_DEFAULTS, **thresholds}.items():
+            setattr(self, name, float(value))
+        self.pulse_until = [0.0] * len(GESTURES)
+        self.lean_since = [-1.0, -1.0, -1.0, -1.0]
+        self.reset()
+
+    def reset(self):
+        """Forget the rider entirely, e.g. when the board itself went away."""
+        for i in range(len(self.pulse_until)):
+            self.pulse_until[i] = 0.0
+        self.on_board = False
+        self._reset()
+
+    def _reset(self):
+        self.held = 0  # lean bits currently held
+        self.pulsed = 0  # momentary bits whose pulse has not expired
+        self.off_since = -1.0
+        self.on_at = 0.0
+        self.weight = 0.0  # body weight baseline, 0 until taken
+        self.phase = _QUIET
+        self.phase_at = 0.0
+        self.quiet_until = 0.0
+        self.side = 0  # -1 / 1 while the CoP is beyond -shift / +shift
+        self.side_at = 0.0
+        for i in range(4):
+            self.lean_since[i] = -1.0
+
+    def _pulse(self, t, name):
+        bit = GESTURE_BITS[name]
+        self.pulse_until[bit.bit_length() - 1] = t + self.pulse_s
+        self.pulsed |= bit
+
+    def _lean(self, t, i, value):
+        bit = self.LEAN_BITS[i]
+        if self.held & bit:
+            if value < self.lean_off:
+                self.held &= ~bit
+                self.lean_since[i] = -1.0
+        elif value > self.lean_on:
+            since = self.lean_since[i]
+            if since < 0.0:
+                self.lean_since[i] = t
+            elif t - since >= self.lean_s:
+                self.held |= bit
+        else:
+            self.lean_since[i] = -1.0
+
+    def _jump_squat(self, t, ratio):
+        phase = self.phase
+        if phase == _AIR:
+            if ratio > self.land:
+                self._pulse(t, "jump")
+                self.phase = _QUIET
+                self.quiet_until = t + self.quiet_s
+            elif t - self.phase_at > self.air_s:
+                self.phase = _QUIET
+        elif ratio < self.unload:
+            self.phase, self.phase_at = _AIR, t
+        elif phase == _QUIET:
+            if t < self.quiet_until:
+                return
+            if ratio < self.dip:
+                self.phase, self.phase_at = _DIP, t
+            elif abs(ratio - 1.0) < 0.05:
+                self.weight *= 1.0 + 0.01 * (ratio - 1.0)  # follow slow drift while still
+        elif phase == _DIP:
+            if ratio > self.recover:
+                self.phase, self.phase_at = _PUSH, t
+            elif t - self.phase_at > self.squat_s:
+                self.phase = _QUIET
+        elif t - self.phase_at >= self.confirm_s:  # _PUSH without take-off
+            self._pulse(t, "squat")
+            self.phase = _QUIET
+            self.quiet_until = t + self.quiet_s
+
+    def update(self, t, total, x, y):
+        """Feed one sample (lbs, CoP -1..1); returns the GESTURE_BITS mask to signal now."""
+        if self.on_board:
+            if total < self.off_lbs:
+                if self.off_since < 0.0:
+                    self.off_since = t
+                elif t - self.off_since >= self.off_s:
+                    self.on_board = False
+                    self._reset()
+                    self._pulse(t, "step_off")
+            else:
+                self.off_since = -1.0
+        elif total > self.on_lbs:
+            self.on_board = True
+            self.on_at = t
+            self._pulse(t, "step_on")
+
+        if self.on_board:
+            if self.weight:
+                self._jump_squat(t, total / self.weight)
+            elif t - self.on_at >= self.settle_s:
+                self.weight = total
+            if total >= self.off_lbs:
+                self._lean(t, 0, -x)
+                self._lean(t, 1, x)
+                self._lean(t, 2, y)
+                self._lean(t, 3, -y)
+                shift = self.shift
+                if x < -shift:
+                    if self.side == 1 and t - self.side_at <= self.shift_s:
+                        self._pulse(t, "shift_left")
+                    self.side, self.side_at = -1, t
+                elif x > shift:
+                    if self.side == -1 and t - self.side_at <= self.shift_s:
+                        self._pulse(t, "shift_right")
+                    self.side, self.side_at = 1, t
+
+        pulsed = self.pulsed
+        if pulsed:
+            until = self.pulse_until
+            for i in range(len(until)):
+                if pulsed >> i & 1 and t >= until[i]:
+                    pulsed &= ~(1 << i)
+            self.pulsed = pulsed
+        return self.held | pulsed
+
+
+### --- Settled weight ---
+# Scale readout that does not wait for a smoothing filter. The unfiltered
+# total is watched over a short sliding window; once its spread is small
+# enough the window mean is locked in, and every further steady sample is
+# averaged into it, so the estimate keeps improving like a plain mean
+# instead of creeping towards the truth like an EMA.
+SETTLE_WINDOW_S = 0.3  # the total must stay steady for this long...
+SETTLE_STD_LBS = 0.3  # ...with a standard deviation below this...
+SETTLE_STD_FRACTION = 0.002  # ...plus this fraction of the weight (breathing, heartbeat)
+SETTLE_BREAK_LBS = 1.5  # the window mean moving this far from the locked weight unlocks it
+
+
+class WeightSettler:
+    """Detects a steady total weight from its running variance; update() is O(1).
+
+    update() returns the settled weight in lbs, or 0.0 while the reading is
+    still moving or below ``min_lbs``. The window keeps running sums of (value - ref) and their
+    squares, with ``ref`` the first value of the window, so the variance
+    does not lose precision to the size of the weight itself.
+    """
+
+    def __init__(self, window_s=SETTLE_WINDOW_S):
+        self.window_s = window_s
+        self.samples = collections.deque()  # (t, value - ref)
+        self.reset()
+
+    def reset(self):
+        self.samples.clear()
+        self.ref = 0.0
+        self.sum = 0.0
+        self.sumsq = 0.0
+        self.locked_sum = 0.0  # sum and count of the steady samples behind the settled weight
+        self.locked_n = 0
+
+    def update(self, t, total, min_lbs=IDLE_WEIGHT_LBS):
+        samples = self.samples
+        if total < min_lbs or (samples and t - samples[-1][0] > MAX_FILTER_DT):
+            if samples:
+                self.reset()
+            return 0.0
+        if not samples:
+            self.ref = total
+        d = total - self.ref
+        samples.append((t, d))
+        self.sum += d
+        self.sumsq += d * d
+        horizon = t - self.window_s
+        while samples[0][0] < horizon:
+            _, old = samples.popleft()
+            self.sum -= old
+            self.sumsq -= old * old
+
+        n = len(samples)
+        mean = self.sum / n
+        var = max(0.0, self.sumsq / n - mean * mean)
+        mean += self.ref
+        limit = SETTLE_STD_LBS + SETTLE_STD_FRACTION * mean
+        if self.locked_n:
+            settled = self.locked_sum / self.locked_n
+            if abs(mean - settled) > SETTLE_BREAK_LBS or var > 4.0 * limit * limit:
+                self.locked_n = 0  # stepped, leaned hard or someone got on or off
+                return 0.0
+            if abs(total - settled) <= SETTLE_BREAK_LBS:
+                self.locked_sum += total
+                self.locked_n += 1
+            return self.locked_sum / self.locked_n
+        # Lock only once the window is (nearly) full, so a few equal samples cannot.
+        if t - samples[0][0] >= 0.9 * self.window_s and var <= limit * limit:
+            self.locked_sum = mean * n
+            self.locked_n = n
+            return mean
+        return 0.0
+
+
+### --- Instrumentation ---
+class LatencyHistogram:
+    """Fixed power-of-two buckets of microseconds; recording is O(1) and allocation-free."""
+
+    __slots__ = ("counts", "count", "total_ns", "max_ns")
+    BUCKETS = 24  # bucket i holds durations below 2**i us; the last one is open-ended
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, ns):
+        self.counts[min((ns // 1000).bit_length(), self.BUCKETS - 1)] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def percentile(self, pct):
+        """Upper bound, in microseconds, of the bucket holding the pct-th percentile."""
+        if not self.count:
+            return 0.0
+        target = self.count * pct / 100.0
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(float(2**i), self.max_ns / 1000.0)
+        return self.max_ns / 1000.0
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean_us": round(self.total_ns / self.count / 1000.0, 2) if self.count else 0.0,
+            "p50_us": self.percentile(50),
+            "p99_us": self.percentile(99),
+            "max_us": round(self.max_ns / 1000.0, 2),
+            "buckets_us": {f"<{2**i}": n for i, n in enumerate(self.counts) if n},
+        }
+
+
+class ReaderStats:
+    """Counters and latency histograms of one board, updated by the reader thread.
+
+    Only the reader thread writes; readers of snapshot() may see values a
+    sample apart from each other, which is fine for monitoring.
+    """
+
+    STAGES = ("decode", "filter", "emit", "read_to_emit")
+
+    def __init__(self):
+        self.started = time.time()
+        self.samples_in = 0
+        self.frames_out = 0
+        self.dropped = 0  # kernel SYN_DROPPED and similar input-side losses
+        self.reconnects = 0
+        self.vjoy_reinits = 0
+        self.hid_writes = 0  # joystick device updates actually issued
+        self.hid_skipped = 0  # updates suppressed because nothing changed
+        self.stream_sent = 0  # network stream datagrams handed to the kernel
+        self.stream_dropped = 0  # datagrams dropped because a socket was full
+        self.input_hz = 0.0
+        self.output_hz = 0.0
+        self.latency = {name: LatencyHistogram() for name in self.STAGES}
+        self._window_start = time.perf_counter_ns()
+        self._window_in = 0
+        self._window_out = 0
+
+    def roll(self, now_ns):
+        """Refresh the per-second rates; cheap enough to call once per read()."""
+        elapsed = now_ns - self._window_start
+        if elapsed >= 1_000_000_000:
+            self.input_hz = (self.samples_in - self._window_in) * 1e9 / elapsed
+            self.output_hz = (self.frames_out - self._window_out) * 1e9 / elapsed
+            self._window_start = now_ns
+            self._window_in = self.samples_in
+            self._window_out = self.frames_out
+
+    def snapshot(self):
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "samples_in": self.samples_in,
+            "frames_out": self.frames_out,
+            "input_hz": round(self.input_hz, 1),
+            "output_hz": round(self.output_hz, 1),
+            "dropped": self.dropped,
+            "reconnects": self.reconnects,
+            "vjoy_reinits": self.vjoy_reinits,
+            "hid_writes": self.hid_writes,
+            "hid_skipped": self.hid_skipped,
+            "stream_sent": self.stream_sent,
+            "stream_dropped": self.stream_dropped,
+            "latency": {name: hist.snapshot() for name, hist in self.latency.items()},
+        }
+
+
+remote_stats = None  # latest stats_snapshot() pushed by a ReaderProcess, shown instead of our own
+
+
+def start_stats_server(port, host="127.0.0.1"):
+    """Serve stats_snapshot() as JSON at http://host:port/stats from a daemon thread."""
+    import http.server
+    import json
+
+    class StatsHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path not in ("/", "/stats"):
+                self.send_error(404)
+                return
+            body = json.dumps(stats_snapshot(), indent=2).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # keep request logging out of the application log
+
+    server = http.server.ThreadingHTTPServer((host, port), StatsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    log.info(f"Stats available at http://{host}:{server.server_port}/stats")
+    return server
+
+
+def stats_snapshot():
+    """Reader stats and sway analytics of every board, keyed by its label, as served over HTTP."""
+    snap = {"boards": {state.label: state.stats.snapshot() for state in boards}}
+    sway = {state.label: state.sway.snapshot() for state in boards if state.sway}
+    if sway:
+        snap["sway"] = sway
+    return snap
+
+
+# Default Wiimote calibration values (replaced per board when it is read)
+# Each sensor has 3 calibration points: [0 kg, 17 kg, 34 kg]
+DEFAULT_CALIBRATION = {
+    "TR": [7500, 13000, 18500],
+    "BR": [7500, 13000, 18500],
+    "TL": [7500, 13000, 18500],
+    "BL": [7500, 13000, 18500],
+}
+SENSOR_NAMES = ("TL", "TR", "BL", "BR")  # BoardState.raw / Frame order
+
+
+def _copy_calibration(cal):
+    return {name: list(points) for name, points in cal.items()}
+
+
+def _compile_calibration(calibration):
+    """Turn 3-point calibration into per-sensor raw -> lbs lookup tables.
+
+    Returns one 65536-entry table per sensor in TL, TR, BL, BR order, built
+    from the piecewise-linear slope/intercept of each sensor, so decoding a
+    sample is four indexing operations.
+    """
+    full_scale = 17.0 * 2.20462  # lbs at the 17 kg calibration point
+    tables = []
+    for name in SENSOR_NAMES:
+        c0, c1, c2 = calibration[name]
+        # Increasing calibration points (every real board) need no clamping
+        # except the zero run below c0, which keeps building the tables fast.
+        if c1 > c0:
+            k = full_scale / (c1 - c0)
+            below = [0.0] * c0 + [(v - c0) * k for v in range(c0, c1)]
+        elif c1 != c0:
+            k = full_scale / (c1 - c0)
+            below = [max(0.0, (v - c0) * k) for v in range(c1)]
+        else:
+            below = [0.0] * c1
+        if c2 > c1:
+            k = full_scale / (c2 - c1)
+            above = [full_scale + (v - c1) * k for v in range(c1, 0x10000)]
+        elif c2 != c1:
+            k = full_scale / (c2 - c1)
+            above = [max(0.0, full_scale + (v - c1) * k) for v in range(c1, 0x10000)]
+        else:
+            above = [full_scale] * (0x10000 - c1)
+        tables.append(array("d", below + above))
+    return tables
 
 
-def _get_adjusted_data():
-    # Subtract tare, then zero out tiny sensor drift using a small noise floor.
-    floor = NOISE_FLOOR_LBS_EXACT if exact_mode else NOISE_FLOOR_LBS
-    adjusted = [max(0.0, filtered_raw[i] - tare_offset[i]) for i in range(4)]
-    return [0.0 if val < floor else val for val in adjusted]
+def default_cache_path():
+    base = os.environ.get("LOCALAPPDATA") if platform.system() == "Windows" else None
+    base = base or os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "wiibalance", "calibration.json")
 
 
-def _update_filtered():
-    for i in range(4):
-        filtered_raw[i] = (SMOOTH_ALPHA * raw_data[i]) + ((1 - SMOOTH_ALPHA) * filtered_raw[i])
+class CalibrationCache:
+    """Board calibrations kept on disk, keyed by device serial or HID path.
 
-### --- Linux Input + HID Output ---
-if platform.system() == "Linux":
-    import evdev
-    import uinput
-    from evdev import ecodes
+    A cache hit lets a board start streaming right after extension init
+    instead of waiting for the calibration read. Entries are only a hint:
+    the backend still checks them against the board and rewrites stale
+    ones. I/O errors are logged and otherwise ignored.
+    """
 
-    device = None
+    def __init__(self, path=None):
+        self.path = path or default_cache_path()
+        self._entries = None
 
-    def create_virtual_joystick():
-        events = [
-            uinput.ABS_X + (0, 255, 0, 0),
-            uinput.ABS_Y + (0, 255, 0, 0),
-            # uinput.ABS_RX + (0, 255, 0, 0),
-            # uinput.ABS_RY + (0, 255, 0, 0),
-            # uinput.ABS_Z + (0, 255, 0, 0),
-            # uinput.ABS_RZ + (0, 255, 0, 0),
-            uinput.BTN_A,
-        ]
-        return uinput.Device(events, name="Wii Balance Board HID")
-
-    def send_hid_output(device):
-        adjusted = _get_adjusted_data()
-        total_weight = sum(adjusted)
-        if not exact_mode and total_weight <= 5:
-            total_weight = 0.0000000001  # Prevent divide-by-zero while idle
-        elif total_weight <= 0:
-            total_weight = 0.0000000001
-
-        top = adjusted[0] + adjusted[1]
-        bottom = adjusted[2] + adjusted[3]
-        left = adjusted[0] + adjusted[2]
-        right = adjusted[1] + adjusted[3]
-
-        # Match red dot direction
-        x = (right - left) / total_weight
-        y = (top - bottom) / total_weight
-
-        # Clamp to range [-1, 1]
-        x = max(-1.0, min(1.0, x))
-        y = max(-1.0, min(1.0, y))
-        print(f"X: {x:.3f}, Y: {y:.3f}")
-
-        # Convert to joystick range [0, 255] where 128 is center
-        joy_x = int((x + 1) * 127.5)
-        joy_y = int((y + 1) * 127.5)
-
-        device.emit(uinput.ABS_X, joy_x)
-        device.emit(uinput.ABS_Y, joy_y)
-
-        # Send raw pressures as analogs
-        # norm_data = [min(1.0, max(0.0, val / total_weight)) for val in adjusted]
-
-        # device.emit(uinput.ABS_RX, int(norm_data[0] * 255))
-        # device.emit(uinput.ABS_RY, int(norm_data[1] * 255))
-        # device.emit(uinput.ABS_Z, int(norm_data[2] * 255))
-        # device.emit(uinput.ABS_RZ, int(norm_data[3] * 255))
-
-    def start_board_reader():
-        global device
-        device = create_virtual_joystick()
-        send_hid_output(device)
-
-        def get_board_device():
-            devices = [
-                path
-                for path in evdev.list_devices()
-                if evdev.InputDevice(path).name == "Nintendo Wii Remote Balance Board"
-            ]
-            return evdev.InputDevice(devices[0]) if devices else None
+    def _load(self):
+        if self._entries is None:
+            import json
 
-        print("Waiting for balance board (Linux)...")
-        board = None
-        while not board:
-            board = get_board_device()
-            time.sleep(0.5)
+            try:
+                with open(self.path) as f:
+                    self._entries = json.load(f)
+            except FileNotFoundError:
+                self._entries = {}
+            except (OSError, ValueError) as e:
+                log.warning(f"Ignoring calibration cache {self.path}: {e}")
+                self._entries = {}
+        return self._entries
+
+    def get(self, key):
+        entry = self._load().get(key)
+        if not entry or set(entry) != set(SENSOR_NAMES):
+            return None
+        return _copy_calibration(entry)
 
-        print("Balance board found, please step on.")
+    def put(self, key, calibration):
+        import json
 
+        entries = self._load()
+        if entries.get(key) == calibration:
+            return
+        entries[key] = _copy_calibration(calibration)
+        tmp = self.path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp, "w") as f:
+                json.dump(entries, f, sort_keys=True)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            log.warning(f"Could not write calibration cache {self.path}: {e}")
+
+
+def _evdev_to_lbs(value):
+    """Convert a Linux wiimote-driver sensor value (10 g units) to pounds."""
+    return (value / 100) * 2.2046
+
+
+### --- Per-board state ---
+class BoardState:
+    """Processing state for one board: current sample, filters, tare and latest frame.
+
+    Every connected board has its own BoardState, so filter history and tare
+    never leak between boards. ``raw`` and ``filtered`` are only touched by
+    the reader loop; the UI reads ``frame`` and replaces ``tare`` whole.
+    """
+
+    def __init__(self, index=0):
+        self.index = index
+        self.raw = [0.0, 0.0, 0.0, 0.0]  # TL, TR, BL, BR
+        self.filtered = [0.0, 0.0, 0.0, 0.0]
+        self.button = False
+        self.tare = (0.0, 0.0, 0.0, 0.0)  # replaced whole, never mutated in place
+        self.frame = Frame(0.0, (0.0, 0.0, 0.0, 0.0), (0.0, 0.0, 0.0, 0.0), 0.0, 0.0, 0.0, False, False, index)
+        self._filters = None  # (exact_mode, weight filter, CoP filter) currently in use
+        self.sway = None  # SwayAnalyzer when sway analytics are enabled
+        self.gestures = None  # GestureDetector when gesture detection is enabled
+        self.settler = WeightSettler()
+        self.stats = ReaderStats()
+
+    @property
+    def label(self):
+        return f"Board {self.index + 1}"
+
+    def filters(self):
+        """The filters for the current exact_mode, swapped in when the mode changes."""
+        current = self._filters
+        if current is None or current[0] != exact_mode:
+            make_weight, make_cop = FILTER_PROFILES[filter_profile[exact_mode]]
+            weight_filter = make_weight()
+            # Continue from the current estimate so switching modes does not jump.
+            weight_filter.last_t = current[1].last_t if current else None
+            current = self._filters = (exact_mode, weight_filter, make_cop() if make_cop else None)
+        return current
+
+    def update_filtered(self, timestamp):
+        self.filters()[1].update(timestamp, self.raw, self.filtered)
+
+    def build_frame(self, timestamp):
+        # Subtract tare, then zero out tiny sensor drift using a small noise floor.
+        floor = NOISE_FLOOR_LBS_EXACT if exact_mode else NOISE_FLOOR_LBS
+        tare = self.tare
+        filtered = self.filtered
+        adjusted = [max(0.0, filtered[i] - tare[i]) for i in range(4)]
+        tl, tr, bl, br = [0.0 if val < floor else val for val in adjusted]
+        total = tl + tr + bl + br
+
+        cop_filter = self.filters()[2]
+        if total > 0:
+            x = ((tr + br) - (tl + bl)) / total
+            y = ((tl + tr) - (bl + br)) / total
+            if cop_filter:
+                x, y = cop_filter.update(timestamp, x, y)
+            x = max(-1.0, min(1.0, x))
+            y = max(-1.0, min(1.0, y))
+        else:
+            x = y = 0.0
+            if cop_filter:
+                cop_filter.reset()
+        active = total > (0.0 if exact_mode else IDLE_WEIGHT_LBS)
+        gestures = self.gestures.update(timestamp, total, x, y) if self.gestures else 0
+        # Settling looks at the unfiltered total: its noise is what it measures.
+        raw = self.raw
+        raw_total = (
+            max(0.0, raw[0] - tare[0])
+            + max(0.0, raw[1] - tare[1])
+            + max(0.0, raw[2] - tare[2])
+            + max(0.0, raw[3] - tare[3])
+        )
+        settled = self.settler.update(timestamp, raw_total, floor if exact_mode else IDLE_WEIGHT_LBS)
+
+        return Frame(
+            timestamp, tuple(raw), (tl, tr, bl, br), total, x, y, active, self.button, self.index, gestures, settled
+        )
+
+    def process_sample(self, timestamp):
+        """Filter the current raw sample, then build and publish its frame."""
+        self.update_filtered(timestamp)
+        frame = self.build_frame(timestamp)
+        self.frame = frame
+        return frame
+
+    def reset(self, timestamp):
+        """Drop all history of a board that went away and publish an empty frame."""
+        self.raw[:] = [0.0, 0.0, 0.0, 0.0]
+        self.button = False
+        self._filters = None
+        self.settler.reset()
+        if self.gestures:
+            self.gestures.reset()
+        return self.process_sample(timestamp)
+
+
+boards = [BoardState()]  # one per served board, replaced when the reader starts
+
+
+### --- Capture / Replay ---
+# A capture is a small header followed by fixed-size little-endian records,
+# one per board frame, holding the sensor values exactly as the backend
+# received them (evdev counts or raw Wiimote 0x34 values) so that decoding,
+# filtering and output can be re-run offline. Records have the same layout
+# as the samples backends produce: (timestamp, button, tl, tr, bl, br).
+CAPTURE_MAGIC = b"WBBCAP01"
+CAPTURE_SOURCE_EVDEV = 1
+CAPTURE_SOURCE_WIIMOTE = 2
+# magic, source, pad, calibration [0 kg, 17 kg, 34 kg] x TL, TR, BL, BR
+CAPTURE_HEADER = struct.Struct("<8sB3x12H")
+# wall-clock seconds, button, pad, TL, TR, BL, BR
+CAPTURE_RECORD = struct.Struct("<dB3x4i")
+
+
+class CaptureWriter:
+    """Append-only writer that packs records into a preallocated buffer."""
+
+    def __init__(self, path, source, calibration=None, batch=512):
+        cal = calibration or DEFAULT_CALIBRATION
+        self._file = open(path, "wb")
+        points = [cal[name][group] for group in range(3) for name in SENSOR_NAMES]
+        self._file.write(CAPTURE_HEADER.pack(CAPTURE_MAGIC, source, *points))
+        self._buf = bytearray(CAPTURE_RECORD.size * batch)
+        self._view = memoryview(self._buf)
+        self._pos = 0
+        self._lock = threading.Lock()  # close() may run from the main thread at exit
+
+    def write(self, timestamp, button, tl, tr, bl, br):
+        with self._lock:
+            CAPTURE_RECORD.pack_into(self._buf, self._pos, timestamp, button, tl, tr, bl, br)
+            self._pos += CAPTURE_RECORD.size
+            if self._pos == len(self._buf):
+                self._file.write(self._view)
+                self._pos = 0
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(self._view[: self._pos])
+            self._pos = 0
+            self._file.close()
+
+
+def open_capture(path, source, calibration=None):
+    writer = CaptureWriter(path, source, calibration)
+    atexit.register(writer.close)
+    log.info(f"Recording board samples to {path}")
+    return writer
+
+
+class CaptureReader:
+    """Memory-mapped, zero-copy view over a capture file."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.source, *cal = CAPTURE_HEADER.unpack_from(self._map, 0)
+        if magic != CAPTURE_MAGIC:
+            raise ValueError(f"{path} is not a balance board capture")
+        self.calibration = {
+            name: [cal[group * 4 + i] for group in range(3)] for i, name in enumerate(SENSOR_NAMES)
+        }
+        # Ignore a partial trailing record left by an interrupted recording.
+        body = len(self._map) - CAPTURE_HEADER.size
+        self._end = CAPTURE_HEADER.size + body - body % CAPTURE_RECORD.size
+
+    def __len__(self):
+        return (self._end - CAPTURE_HEADER.size) // CAPTURE_RECORD.size
+
+    def records(self):
+        """Iterate (timestamp, button, tl, tr, bl, br) straight out of the map."""
+        return CAPTURE_RECORD.iter_unpack(memoryview(self._map)[CAPTURE_HEADER.size : self._end])
+
+
+### --- Wiimote HID protocol helpers ---
+NINTENDO_VID = 0x057E
+BALANCE_BOARD_PID = 0x0306
+
+
+def _pad_report(data, size=22):
+    """Pad an output report to the Wiimote output report size."""
+    return data + [0x00] * (size - len(data))
+
+
+def _write_register(board, address, data_bytes):
+    """Write data to a Wiimote register (report 0x16)."""
+    addr = [(address >> 16) & 0xFF, (address >> 8) & 0xFF, address & 0xFF]
+    report = [0x16, 0x04] + addr + [len(data_bytes)] + list(data_bytes)
+    board.write(_pad_report(report))
+
+
+def _read_register(board, address, size):
+    """Request a read from a Wiimote register (report 0x17)."""
+    addr = [(address >> 16) & 0xFF, (address >> 8) & 0xFF, address & 0xFF]
+    size_bytes = [(size >> 8) & 0xFF, size & 0xFF]
+    report = [0x17, 0x04] + addr + size_bytes
+    board.write(_pad_report(report))
+
+
+REGISTER_TIMEOUT = 0.25  # resend a register request that got no reply by then
+REGISTER_RETRIES = 3
+CONNECT_INTERVAL = 1.0  # seconds between attempts to find an absent hidapi board
+
+
+class RegisterRequest:
+    """One queued register read (0x17) or write (0x16).
+
+    ``data`` holds the bytes read once a read completes, and ``ok`` tells
+    whether the board acknowledged the request before it ran out of retries.
+    """
+
+    __slots__ = ("kind", "address", "size", "payload", "data", "received", "callback", "sent_at", "tries", "ok")
+
+    def __init__(self, kind, address, size, payload=None, callback=None):
+        self.kind = kind
+        self.address = address
+        self.size = size
+        self.payload = payload
+        self.data = bytearray(size) if kind == 0x17 else None
+        self.received = 0
+        self.callback = callback
+        self.sent_at = None
+        self.tries = 0
+        self.ok = False
+
+
+class RegisterLink:
+    """Asynchronous Wiimote register reads (0x17 -> 0x21) and writes (0x16 -> 0x22).
+
+    Requests are queued and sent one at a time, each as soon as the previous
+    one is answered, because the Wiimote ignores a register request while
+    another is in flight. Replies are matched to the outstanding request by
+    address. Feed every input report to handle(): it consumes register
+    replies and returns False for everything else, so data (0x34) and
+    status (0x20) reports keep flowing to the caller. poll() resends
+    requests that went unanswered.
+    """
+
+    def __init__(self, board):
+        self.board = board
+        self._queue = collections.deque()
+        self._current = None
+
+    @property
+    def idle(self):
+        return self._current is None and not self._queue
+
+    def write(self, address, data_bytes, callback=None):
+        return self._submit(RegisterRequest(0x16, address, len(data_bytes), list(data_bytes), callback))
+
+    def read(self, address, size, callback=None):
+        return self._submit(RegisterRequest(0x17, address, size, callback=callback))
+
+    def _submit(self, request):
+        self._queue.append(request)
+        if self._current is None:
+            self._send_next()
+        return request
+
+    def _send(self, request):
+        request.tries += 1
+        request.received = 0
+        request.sent_at = time.monotonic()
+        if request.kind == 0x16:
+            _write_register(self.board, request.address, request.payload)
+        else:
+            _read_register(self.board, request.address, request.size)
+
+    def _send_next(self):
+        self._current = self._queue.popleft() if self._queue else None
+        if self._current is not None:
+            self._send(self._current)
+
+    def _finish(self, request, ok):
+        request.ok = ok
+        if not ok:
+            request.data = None
+        self._send_next()
+        if request.callback:
+            request.callback(request)
+
+    def handle(self, data):
+        """Complete the outstanding request from a 0x21/0x22 reply; False for other reports."""
+        report_id = data[0]
+        if report_id not in (0x21, 0x22):
+            return False
+        request = self._current
+        if report_id == 0x22:
+            # 0x22: buttons (2), acknowledged report id, error code
+            if request is not None and request.kind == 0x16 and len(data) >= 5 and data[3] == 0x16:
+                self._finish(request, data[4] == 0)
+            return True
+        # 0x21: buttons (2), size-1 << 4 | error, address low 16 bits, 16 data bytes
+        if request is None or request.kind != 0x17 or len(data) < 6:
+            return True
+        offset = ((data[4] << 8) | data[5]) - (request.address & 0xFFFF)
+        if not 0 <= offset < request.size:
+            return True  # late reply to an earlier request
+        if data[3] & 0x0F:
+            self._finish(request, False)
+            return True
+        n = min((data[3] >> 4) + 1, request.size - offset)
+        request.data[offset : offset + n] = bytes(data[6 : 6 + n])
+        request.received += n
+        if request.received >= request.size:
+            self._finish(request, True)
+        return True
+
+    def poll(self, now=None):
+        request = self._current
+        if request is None:
+            return
+        now = time.monotonic() if now is None else now
+        if now - request.sent_at < REGISTER_TIMEOUT:
+            return
+        if request.tries < REGISTER_RETRIES:
+            log.debug(f"Register request 0x{request.address:06X} unanswered, resending.")
+            self._send(request)
+        else:
+            log.warning(f"Register request 0x{request.address:06X} failed after {request.tries} tries.")
+            self._finish(request, False)
+
+
+CALIBRATION_ADDRESS = 0xA40024  # 0 kg, 17 kg and 34 kg readings, 24 bytes
+
+
+def _parse_calibration(cal_raw, calibration):
+    """Fill ``calibration`` from calibration bytes read at CALIBRATION_ADDRESS.
+
+    24 bytes cover all three points; a shorter read fills only the leading
+    groups (8 bytes = the 0 kg readings).
+    """
+    # 3 groups (0 kg, 17 kg, 34 kg) × 4 sensors × 2 bytes BE
+    sensors = ["TR", "BR", "TL", "BL"]
+    for group in range(min(3, len(cal_raw) // 8)):
+        for i, sensor in enumerate(sensors):
+            offset = group * 8 + i * 2
+            val = (cal_raw[offset] << 8) | cal_raw[offset + 1]
+            if val != 0:
+                calibration[sensor][group] = val
+
+
+def _decode_balance_report(data):
+    """Split a 0x34 report into (button, tl, tr, bl, br) raw values."""
+    # Button data — A button is bit 3 of byte 2
+    # Extension data: 4 sensors × 2 bytes big-endian starting at byte 3
+    return (
+        bool(data[2] & 0x08),
+        (data[7] << 8) | data[8],  # TL
+        (data[3] << 8) | data[4],  # TR
+        (data[9] << 8) | data[10],  # BL
+        (data[5] << 8) | data[6],  # BR
+    )
+
+
+def _import_numpy(what="batch decoding"):
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError(f"{what} needs NumPy: pip install numpy") from None
+    return numpy
+
+
+def calibration_lut(tables):
+    """_compile_calibration() tables as one (4, 65536) NumPy array; build it once per calibration."""
+    np = _import_numpy()
+    return np.stack([np.frombuffer(t, dtype=np.float64) for t in tables])
+
+
+def decode_reports(buffer, lut, report_size=22):
+    """Decode a buffer of concatenated 0x34 reports in one NumPy pass.
+
+    ``lut`` comes from calibration_lut(); plain _compile_calibration() tables
+    are converted on every call. Returns (weights, buttons): an (N, 4) float
+    array of lbs in TL, TR, BL, BR order and an (N,) bool array of A-button
+    states. Reports with any other ID are skipped.
+    """
+    np = _import_numpy()
+    if not isinstance(lut, np.ndarray):
+        lut = calibration_lut(lut)
+    reports = np.frombuffer(bytes(buffer), dtype=np.uint8).reshape(-1, report_size)
+    reports = reports[reports[:, 0] == 0x34]
+    # Bytes 3..10 are TR, BR, TL, BL as big-endian uint16
+    raw = np.ascontiguousarray(reports[:, 3:11]).view(">u2")[:, [2, 0, 3, 1]]
+    return lut[np.arange(4), raw], (reports[:, 2] & 0x08).astype(bool)
+
+
+def load_capture_arrays(path):
+    """Decode a whole capture file into NumPy arrays without a Python loop.
+
+    Returns (timestamps, buttons, weights) with weights as an (N, 4) array of
+    lbs in TL, TR, BL, BR order. The records are viewed straight from the
+    memory map; only the decoded weights are newly allocated.
+    """
+    np = _import_numpy()
+    capture = CaptureReader(path)
+    dtype = np.dtype([("timestamp", "<f8"), ("button", "u1"), ("pad", "V3"), ("raw", "<i4", (4,))])
+    records = np.frombuffer(capture._map, dtype=dtype, count=len(capture), offset=CAPTURE_HEADER.size)
+    if capture.source == CAPTURE_SOURCE_WIIMOTE:
+        lut = calibration_lut(_compile_calibration(capture.calibration))
+        weights = lut[np.arange(4), np.clip(records["raw"], 0, 0xFFFF)]
+    else:
+        weights = records["raw"] / 100 * 2.2046
+    return records["timestamp"], records["button"].astype(bool), weights
+
+
+### --- Input backends ---
+# Every backend turns its device into samples of the form
+# (timestamp, button, tl, tr, bl, br) with one sample per complete board
+# frame and the sensor values in the backend's native units; decode() maps
+# those values to pounds. read() blocks for up to ``timeout`` seconds (None =
+# until data arrives) and returns the samples that became available, or None
+# once a finite source is exhausted. Backends with a pollable file descriptor
+# expose it through fileno() so many boards can share one selector; the rest
+# must return promptly from read(0). A backend whose board went away sets
+# ``reset_pending``; the reader then drops the board's filter and gesture
+# history and puts the outputs back to rest.
+
+# Linux input event codes used by the hid-wiimote balance board driver. Kept
+# here so synthetic and replayed event streams work without evdev installed.
+EV_SYN = 0x00
+EV_KEY = 0x01
+EV_ABS = 0x03
+SYN_REPORT = 0
+SYN_DROPPED = 3
+ABS_HAT0X = 0x10
+ABS_HAT0Y = 0x11
+ABS_HAT1X = 0x12
+ABS_HAT1Y = 0x13
+BTN_A = 0x130
+EVDEV_SENSOR_INDEX = {
+    ABS_HAT1X: 0,  # TL
+    ABS_HAT0X: 1,  # TR
+    ABS_HAT1Y: 2,  # BL
+    ABS_HAT0Y: 3,  # BR
+}
+
+
+class InputBackend:
+    capture_source = CAPTURE_SOURCE_EVDEV
+    calibration = None
+    reset_pending = False
+    stats = ReaderStats()  # replaced by the board's own when a BoardSession takes the backend
+
+    def open(self):
+        pass
+
+    def read(self, timeout=None):
+        raise NotImplementedError
+
+    def fileno(self):
+        """File descriptor that turns readable when read() has data, or None."""
+        return None
+
+    def decode(self, tl, tr, bl, br):
+        return [_evdev_to_lbs(tl), _evdev_to_lbs(tr), _evdev_to_lbs(bl), _evdev_to_lbs(br)]
+
+    def close(self):
+        pass
+
+
+class EvdevFrameAssembler:
+    """Collects wiimote-driver events into one sample per SYN_REPORT."""
+
+    def __init__(self, stats=None):
+        self.stats = stats or ReaderStats()
+        self.counts = [0, 0, 0, 0]
+        self.button = False
+        self.dirty = False
+        self.dropping = False
+
+    def feed(self, ev_type, code, value, timestamp):
+        if ev_type == EV_SYN:
+            if code == SYN_REPORT:
+                if self.dropping:
+                    self.dropping = False
+                elif self.dirty:
+                    self.dirty = False
+                    c = self.counts
+                    return (timestamp, self.button, c[0], c[1], c[2], c[3])
+            elif code == SYN_DROPPED:
+                # The kernel buffer overflowed; events up to the next
+                # SYN_REPORT are incomplete, so that frame is skipped.
+                self.stats.dropped += 1
+                self.dropping = True
+            return None
+        if self.dropping:
+            return None
+        if ev_type == EV_ABS:
+            idx = EVDEV_SENSOR_INDEX.get(code)
+            if idx is not None:
+                self.counts[idx] = value
+                self.dirty = True
+        elif ev_type == EV_KEY and code == BTN_A:
+            self.button = bool(value)
+            self.dirty = True
+        return None
+
+
+class _InotifyWatch:
+    """Paths created in, or with changed attributes in, one directory (Linux inotify).
+
+    Python has no inotify binding, so the three libc calls go through
+    ctypes. The fd is non-blocking and pollable; read() drains it.
+    """
+
+    IN_ATTRIB = 0x004  # udev fixing up a new node's permissions
+    IN_CREATE = 0x100
+    IN_NONBLOCK = os.O_NONBLOCK
+    IN_CLOEXEC = 0o2000000
+    EVENT = struct.Struct("iIII")  # wd, mask, cookie, name length
+
+    def __init__(self, path):
+        import ctypes
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(fd, os.fsencode(path), self.IN_CREATE | self.IN_ATTRIB) < 0:
+            errno = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(errno, f"cannot watch {path}")
+        self.fd = fd
+        self.path = path
+
+    def fileno(self):
+        return self.fd
+
+    def read(self):
+        paths = []
         while True:
-            event = board.read_one()
-            if event is None:
+            try:
+                data = os.read(self.fd, 4096)
+            except BlockingIOError:
+                return paths
+            offset = 0
+            while offset < len(data):
+                _, _, _, length = self.EVENT.unpack_from(data, offset)
+                offset += self.EVENT.size
+                name = data[offset : offset + length].rstrip(b"\0")
+                offset += length
+                path = os.path.join(self.path, os.fsdecode(name))
+                if path not in paths:
+                    paths.append(path)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class EvdevBackend(InputBackend):
+    """Balance board exposed by the Linux hid-wiimote driver, found and re-attached via inotify."""
+
+    BOARD_NAME = "Nintendo Wii Remote Balance Board"
+    INPUT_DIR = "/dev/input"
+    _claimed = set()  # device paths already opened by another EvdevBackend
+
+    def __init__(self):
+        self.board = None
+        self.uniq = None  # Bluetooth address of our board; a reconnect only takes that one back
+        self._assembler = None  # EvdevFrameAssembler while attached
+        self._poller = None
+        self._watch = None  # _InotifyWatch while waiting for the board
+        self._unreadable = set()  # new nodes udev has not opened up to us yet
+
+    def _probe(self, path):
+        """Open ``path`` if it is a free balance board (ours, when reconnecting); else close it."""
+        import evdev
+
+        if path in self._claimed or not os.path.basename(path).startswith("event"):
+            return None
+        try:
+            device = evdev.InputDevice(path)
+        except PermissionError:
+            self._unreadable.add(path)  # retried on the IN_ATTRIB that follows
+            return None
+        except OSError:
+            return None  # gone again, or not an input device
+        self._unreadable.discard(path)
+        if device.name == self.BOARD_NAME and (self.uniq is None or device.uniq in (self.uniq, "")):
+            return device
+        device.close()
+        return None
+
+    def _attach(self, paths):
+        for path in paths:
+            board = self._probe(path)
+            if board is None:
                 continue
+            self._watch_stop()
+            self.board = board
+            self.uniq = self.uniq or board.uniq or None
+            self._claimed.add(board.path)
+            self._assembler = EvdevFrameAssembler(self.stats)
+            self._poller.register(board.fd, select.EPOLLIN)
+            log.info(f"Balance board found at {board.path}, please step on.")
+            return
+
+    def _wait_for_board(self):
+        """Watch for new nodes first, then scan the existing ones, so none slips through."""
+        self._watch = _InotifyWatch(self.INPUT_DIR)
+        self._poller.register(self._watch.fd, select.EPOLLIN)
+        self._attach([os.path.join(self.INPUT_DIR, name) for name in sorted(os.listdir(self.INPUT_DIR))])
+
+    def _watch_stop(self):
+        if self._watch:
+            self._poller.unregister(self._watch.fd)
+            self._watch.close()
+            self._watch = None
+        self._unreadable.clear()
+
+    def _detach(self):
+        log.warning("Board disconnected, waiting for it to come back...")
+        self.stats.reconnects += 1
+        self._release()
+        self._wait_for_board()
+        self.reset_pending = True  # nobody is on a board that is gone
+
+    def _release(self):
+        board, self.board = self.board, None
+        if board:
+            self._claimed.discard(board.path)
+            try:
+                self._poller.unregister(board.fd)
+            except OSError:
+                pass
+            try:
+                board.close()
+            except OSError:
+                pass
+
+    def open(self):
+        log.info("Waiting for balance board (Linux)...")
+        self._poller = select.epoll()
+        self._wait_for_board()
+
+    def fileno(self):
+        # Covers the inotify watch and the board alike, so the reader's selector never changes.
+        return self._poller.fileno()
+
+    def read(self, timeout=None):
+        # epoll sleeps until the kernel has events (or creates a node while
+        # we wait), so an idle or absent board costs no CPU. The driver
+        # reports the four sensors and the button as separate events closed
+        # by SYN_REPORT; only whole frames come out.
+        if not self._poller.poll(-1 if timeout is None else timeout):
+            return []
+        if self._watch:
+            self._attach(self._watch.read() + sorted(self._unreadable))
+            if not self.board:
+                return []
+        samples = []
+        feed = self._assembler.feed
+        try:
+            for event in self.board.read():
+                sample = feed(event.type, event.code, event.value, event.timestamp())
+                if sample:
+                    samples.append(sample)
+        except BlockingIOError:
+            pass
+        except OSError:
+            self._detach()
+        return samples
+
+    def close(self):
+        self._release()
+        if self._poller:
+            self._watch_stop()
+            self._poller.close()
+            self._poller = None
+
+
+class HidapiBackend(InputBackend):
+    """Balance board talked to directly over Bluetooth HID (Windows)."""
+
+    capture_source = CAPTURE_SOURCE_WIIMOTE
+    _claimed = set()  # HID paths already opened by another HidapiBackend
+
+    def __init__(self, device_factory=None, enumerate_devices=None, cache=None):
+        # Both hooks default to hidapi; FakeWiimote plugs in here.
+        self._device_factory = device_factory
+        self._enumerate = enumerate_devices
+        self.cache = cache  # CalibrationCache, or None to always read the board
+        self.board = None
+        self.path = None  # kept across reconnects so the board keeps its slot
+        self.cache_key = None
+        self._blocking = True
+        self.calibration = _copy_calibration(DEFAULT_CALIBRATION)
+        self._tables = None
+        self._link = None  # RegisterLink for the current connection
+        self._ready = False  # extension initialised and calibration in
+        self._next_connect = 0.0  # monotonic time of the next connect attempt
+        self._reconnecting = False
+
+    def _connect(self):
+        if self._device_factory is None:
+            import hid
+
+            self._device_factory = hid.device
+            self._enumerate = lambda: hid.enumerate(NINTENDO_VID, BALANCE_BOARD_PID)
+        for dev_info in self._enumerate():
+            path = dev_info["path"]
+            if self.path is not None and path != self.path:
+                continue  # reconnecting: only take our own board back
+            if self.path is None and path in self._claimed:
+                continue
+            try:
+                board = self._device_factory()
+                board.open_path(path)
+                board.set_nonblocking(False)
+                self._blocking = True
+                self.path = path
+                self._claimed.add(path)
+                serial = dev_info.get("serial_number")
+                if not serial:
+                    serial = path.decode(errors="replace") if isinstance(path, bytes) else str(path)
+                self.cache_key = serial
+                name = dev_info.get("product_string", "Wii Balance Board")
+                log.info(f"Found: {name}")
+                return board
+            except Exception as e:
+                log.warning(f"Could not open device: {e}")
+        return None
 
-            if event.code == ecodes.ABS_HAT1X:
-                raw_data[0] = (event.value / 100) * 2.2046
-            elif event.code == ecodes.ABS_HAT0X:
-                raw_data[1] = (event.value / 100) * 2.2046
-            elif event.code == ecodes.ABS_HAT1Y:
-                raw_data[2] = (event.value / 100) * 2.2046
-            elif event.code == ecodes.ABS_HAT0Y:
-                raw_data[3] = (event.value / 100) * 2.2046
-            elif event.code == ecodes.BTN_A:
-                aButton = event.value
-                if aButton:
-                    device.emit(uinput.BTN_A, 1)
+    def open(self):
+        # Never wait here: other boards share the reader loop. read() keeps
+        # trying to connect and completes the init handshake.
+        log.info("Waiting for balance board (Windows)...")
+        log.info("Make sure the board is paired via Bluetooth and press the sync button.")
+        self._try_connect(0)
+
+    def _try_connect(self, timeout):
+        """One connect attempt per CONNECT_INTERVAL, waiting at most ``timeout`` for it."""
+        delay = self._next_connect - time.monotonic()
+        if delay > 0:
+            if timeout == 0:
+                return
+            time.sleep(delay if timeout is None else min(delay, timeout))
+            if time.monotonic() < self._next_connect:
+                return
+        self._next_connect = time.monotonic() + CONNECT_INTERVAL
+        self.board = self._connect()
+        if self.board is None:
+            return
+        if self._reconnecting:
+            log.info("Reconnected!")
+            self._reconnecting = False
+        # Initialize in the background: read() completes the requests, while
+        # on a reconnect decoding keeps the previous (or cached) calibration.
+        self._initialize()
+
+    def _initialize(self):
+        """Queue extension init and calibration; reporting starts as soon as both are usable.
+
+        The extension loses its init when the board power-cycles, so the two
+        init writes are always sent. With a cached calibration, reporting
+        starts once they are acknowledged and only the 0 kg readings are
+        read back to confirm the cache; otherwise the full calibration is
+        read first.
+        """
+        self._ready = False
+        link = self._link = RegisterLink(self.board)
+        cached = self.cache.get(self.cache_key) if self.cache else None
+        # Initialize the extension controller (new-style init)
+        link.write(0xA400F0, [0x55])
+        if cached:
+            self._set_calibration(cached)
+            log.info(f"Calibration from cache: {cached}")
+            link.write(0xA400FB, [0x00], self._start_reporting)
+            link.read(CALIBRATION_ADDRESS, 8, self._check_calibration)
+        else:
+            link.write(0xA400FB, [0x00])
+            link.read(CALIBRATION_ADDRESS, 24, self._calibration_read)
+
+    def _set_calibration(self, calibration):
+        if self._tables is None or calibration != self.calibration:
+            self.calibration = calibration
+            self._tables = _compile_calibration(calibration)
+
+    def _check_calibration(self, request):
+        if not request.ok:
+            return  # keep the cached values; the board may just be slow
+        current = _copy_calibration(self.calibration)
+        _parse_calibration(request.data, current)
+        if current != self.calibration:
+            log.info("Cached calibration is stale, reading it from the board.")
+            self._link.read(CALIBRATION_ADDRESS, 24, self._calibration_read)
+
+    def _calibration_read(self, request):
+        if request.ok:
+            calibration = _copy_calibration(self.calibration)
+            _parse_calibration(request.data, calibration)
+            self._set_calibration(calibration)
+            log.info(f"Calibration loaded: {calibration}")
+            if self.cache:
+                self.cache.put(self.cache_key, calibration)
+        else:
+            log.warning("Calibration read failed; using the last known calibration.")
+            self._set_calibration(self.calibration)
+        if not self._ready:
+            self._start_reporting()
+
+    def _start_reporting(self, request=None):
+        # Set data reporting mode: continuous, 0x34 = buttons + 19 ext bytes
+        self.board.write(_pad_report([0x12, 0x04, 0x34]))
+        # Turn on LED 1 so user knows we're connected
+        self.board.write(_pad_report([0x11, 0x10]))
+        self._ready = True
+        log.info("Balance board initialized, please step on.")
+
+    def _reconnect(self):
+        log.warning("Board disconnected, attempting to reconnect...")
+        self.stats.reconnects += 1
+        try:
+            self.board.close()  # release the dead handle before opening a new one
+        except Exception:
+            pass
+        self.board = None
+        self._reconnecting = True
+        self._next_connect = 0.0
+        self.reset_pending = True  # nobody is on a board that is gone
+
+    def _set_blocking(self, blocking):
+        if blocking != self._blocking:
+            self.board.set_nonblocking(not blocking)
+            self._blocking = blocking
+
+    def _handle_reports(self, reports, samples):
+        link = self._link
+        for data in reports:
+            if not data or link.handle(data):
+                continue
+            report_id = data[0]
+            if report_id == 0x34 and len(data) >= 11:
+                samples.append((time.time(), *_decode_balance_report(data)))
+            elif report_id == 0x20 and self._ready:
+                # Status report — re-set reporting mode (board resets after sync)
+                self.board.write(_pad_report([0x12, 0x04, 0x34]))
+
+    def read(self, timeout=None):
+        # hidapi has no pollable handle, so with several boards the reader
+        # calls read(0): drain whatever reports are queued without waiting.
+        samples = []
+        if self.board is None:
+            self._try_connect(timeout)
+            return samples
+        if not self._link.idle:
+            # Wake up in time to resend an unanswered register request.
+            timeout = REGISTER_TIMEOUT if timeout is None else min(timeout, REGISTER_TIMEOUT)
+        try:
+            if timeout == 0:
+                self._set_blocking(False)
+                reports = iter(lambda: self.board.read(64) or None, None)
+            else:
+                self._set_blocking(True)
+                if timeout is None:
+                    reports = [self.board.read(64)]
                 else:
-                    device.emit(uinput.BTN_A, 0)
+                    reports = [self.board.read(64, max(1, int(timeout * 1000)))]
+            self._handle_reports(reports, samples)
+            self._link.poll()
+        except OSError:
+            # hidapi reports a lost board as a failed read or write. Anything
+            # else is a bug in the report and register handlers: let it surface.
+            self._reconnect()
+        return samples
+
+    def decode(self, tl, tr, bl, br):
+        t = self._tables
+        return [t[0][tl], t[1][tr], t[2][bl], t[3][br]]
+
+    def close(self):
+        if self.board:
+            self.board.close()
+            self.board = None
+        self._claimed.discard(self.path)
+
+
+class ReplayBackend(InputBackend):
+    """Plays back a capture file, paced by its timestamps or at max speed."""
+
+    BATCH = 4096  # records handed out per read() at max speed
+
+    def __init__(self, path, realtime=True):
+        self.path = path
+        self.realtime = realtime
+        self.capture = CaptureReader(path)
+        self.capture_source = self.capture.source
+        if self.capture_source == CAPTURE_SOURCE_WIIMOTE:
+            self.calibration = self.capture.calibration
+            self._tables = _compile_calibration(self.calibration)
+        self._records = None
+        self._next = None  # sample read ahead while waiting for its time
+        self._start = self._first = None
+
+    def open(self):
+        self._records = self.capture.records()
+        log.info(
+            f"Replaying {len(self.capture)} samples from {self.path}"
+            f"{'' if self.realtime else ' at max speed'}."
+        )
 
-            _update_filtered()
-            send_hid_output(device)
+    def read(self, timeout=None):
+        if not self.realtime:
+            batch = list(itertools.islice(self._records, self.BATCH))
+            return batch or None
+
+        sample = self._next or next(self._records, None)
+        self._next = None
+        if sample is None:
+            return None
+        now = time.monotonic()
+        if self._first is None:
+            self._start, self._first = now, sample[0]
+        # Pace against the capture clock; long gaps are not worth waiting out.
+        delay = self._start + (sample[0] - self._first) - now
+        if delay > 1.0:
+            self._start -= delay - 1.0
+            delay = 1.0
+        if delay > 0:
+            if timeout is not None and delay > timeout:
+                # Not due yet; hold it so other boards are not kept waiting.
+                time.sleep(timeout)
+                self._next = sample
+                return []
+            time.sleep(delay)
+        return [sample]
+
+    def decode(self, tl, tr, bl, br):
+        if self.capture_source == CAPTURE_SOURCE_WIIMOTE:
+            return HidapiBackend.decode(self, tl, tr, bl, br)
+        return InputBackend.decode(self, tl, tr, bl, br)
+
+
+class SimulatedRider:
+    """Someone stepping on, swaying, pressing A and stepping off, in kg per sensor."""
+
+    def __init__(self, mass_kg=70.0, cycle_s=12.0, seed=None):
+        self.mass_kg = mass_kg
+        self.cycle_s = cycle_s
+        self._rng = random.Random(seed)
+
+    def sample(self, t):
+        phase = t % self.cycle_s
+        # 1 s empty, 1 s stepping on, sway, 1 s stepping off
+        if phase < 1.0:
+            load = 0.0
+        elif phase < 2.0:
+            load = phase - 1.0
+        elif phase < self.cycle_s - 1.0:
+            load = 1.0
+        else:
+            load = self.cycle_s - phase
+        x = 0.35 * math.sin(2 * math.pi * 0.3 * t) + 0.05 * math.sin(2 * math.pi * 2.1 * t)
+        y = 0.25 * math.sin(2 * math.pi * 0.17 * t + 1.0)
+        mass = self.mass_kg * load
+        gauss = self._rng.gauss
+        kg = (
+            max(0.0, mass * (1 - x) * (1 + y) / 4 + gauss(0, 0.02)),  # TL
+            max(0.0, mass * (1 + x) * (1 + y) / 4 + gauss(0, 0.02)),  # TR
+            max(0.0, mass * (1 - x) * (1 - y) / 4 + gauss(0, 0.02)),  # BL
+            max(0.0, mass * (1 + x) * (1 - y) / 4 + gauss(0, 0.02)),  # BR
+        )
+        button = 4.0 <= phase < 4.2
+        return button, kg
 
-### --- Windows Input (HID) + Output (vJoy) ---
-elif platform.system() == "Windows":
-    import hid
-    import pyvjoy
 
-    VJOY_DEVICE_ID = 1
+def _kg_to_wiimote_raw(kg, cal):
+    """Inverse of the calibration curve for one sensor, for generating reports."""
+    if kg < 17.0:
+        raw = cal[0] + kg / 17.0 * (cal[1] - cal[0])
+    else:
+        raw = cal[1] + (kg - 17.0) / 17.0 * (cal[2] - cal[1])
+    return max(0, min(0xFFFF, int(raw)))
 
-    NINTENDO_VID = 0x057E
-    BALANCE_BOARD_PID = 0x0306
 
-    joystick = None
+class FakeWiimote:
+    """Stand-in for hid.device that speaks the balance board's HID protocol.
 
-    # vJoy axis range: 0x1 to 0x8000 (1 to 32768), center = 0x4000 (16384)
-    VJOY_MIN = 0x1
-    VJOY_MAX = 0x8000
-    VJOY_CENTER = 0x4000
+    Answers register reads (0x17 -> 0x21) from an emulated extension register
+    block holding real-looking calibration, acknowledges register writes
+    (0x16 -> 0x22) and, once 0x34 reporting is requested, streams data
+    reports from a SimulatedRider at ``rate_hz``.
+    """
 
-    # Default calibration values (overwritten when board is read)
-    # Each sensor has 3 calibration points: [0 kg, 17 kg, 34 kg]
-    calibration = {
-        "TR": [7500, 13000, 18500],
-        "BR": [7500, 13000, 18500],
-        "TL": [7500, 13000, 18500],
-        "BL": [7500, 13000, 18500],
+    CALIBRATION = {
+        "TR": [4500, 6100, 7700],
+        "BR": [9700, 11300, 12900],
+        "TL": [16500, 18200, 19900],
+        "BL": [2200, 3900, 5600],
     }
 
-    def _clamp_axis(val):
-        return max(VJOY_MIN, min(VJOY_MAX, val))
+    def __init__(self, rate_hz=100.0, rider=None):
+        self.rate_hz = rate_hz
+        self.rider = rider or SimulatedRider()
+        self.registers = bytearray(0x100)  # extension block 0xA400xx
+        for group in range(3):
+            for i, sensor in enumerate(("TR", "BR", "TL", "BL")):
+                struct.pack_into(">H", self.registers, 0x24 + group * 8 + i * 2, self.CALIBRATION[sensor][group])
+        self.nonblocking = False
+        self.reporting_mode = None
+        self._pending = collections.deque()
+        self._next_due = None
+        self._t0 = time.monotonic()
+
+    def open_path(self, path):
+        pass
+
+    def set_nonblocking(self, nonblocking):
+        self.nonblocking = bool(nonblocking)
+
+    def close(self):
+        pass
+
+    def write(self, report):
+        report_id = report[0]
+        if report_id == 0x16:
+            address = (report[2] << 16) | (report[3] << 8) | report[4]
+            size = report[5]
+            if address >> 8 == 0xA400:
+                self.registers[address & 0xFF : (address & 0xFF) + size] = bytes(report[6 : 6 + size])
+            self._pending.append([0x22, 0x00, 0x00, 0x16, 0x00])
+        elif report_id == 0x17:
+            address = (report[2] << 16) | (report[3] << 8) | report[4]
+            size = (report[5] << 8) | report[6]
+            for chunk in range(0, size, 16):
+                n = min(16, size - chunk)
+                offset = (address & 0xFF) + chunk
+                data = list(self.registers[offset : offset + n]) + [0x00] * (16 - n)
+                lo = (address + chunk) & 0xFFFF
+                self._pending.append([0x21, 0x00, 0x00, ((n - 1) << 4), lo >> 8, lo & 0xFF] + data)
+        elif report_id == 0x12:
+            self.reporting_mode = report[2]
+            self._next_due = time.monotonic()
+        elif report_id == 0x15:
+            self._pending.append([0x20, 0x00, 0x00, 0x00, 0x02, 0x00, 0x00, 0x80])
+        return len(report)
+
+    def _data_report(self, now):
+        button, kg = self.rider.sample(now - self._t0)
+        cal = self.CALIBRATION
+        tl, tr, bl, br = (_kg_to_wiimote_raw(kg[i], cal[name]) for i, name in enumerate(SENSOR_NAMES))
+        report = [0x34, 0x00, 0x08 if button else 0x00]
+        for raw in (tr, br, tl, bl):
+            report += [raw >> 8, raw & 0xFF]
+        return report + [0x00] * 11
+
+    def read(self, max_length, timeout_ms=0):
+        if self._pending:
+            return self._pending.popleft()[:max_length]
+        if self.reporting_mode != 0x34:
+            if not self.nonblocking and timeout_ms:
+                time.sleep(timeout_ms / 1000.0)
+            return []
+        now = time.monotonic()
+        if now < self._next_due:
+            wait = self._next_due - now
+            if self.nonblocking or (timeout_ms and wait > timeout_ms / 1000.0):
+                return []
+            time.sleep(wait)
+            now = self._next_due
+        self._next_due += 1.0 / self.rate_hz
+        return self._data_report(now)[:max_length]
+
+
+class SyntheticBackend(InputBackend):
+    """Generated evdev event stream from a SimulatedRider, for load tests.
+
+    Produces the same ABS_HAT/BTN_A/SYN_REPORT events the Linux driver does
+    and feeds them through EvdevFrameAssembler. Samples that fall due while
+    the consumer is busy are generated in one batch, so rates of several kHz
+    are reachable. Use ``synthetic_wiimote_backend()`` to exercise the
+    Wiimote report path instead.
+    """
+
+    def __init__(self, rate_hz=100.0, rider=None):
+        self.rate_hz = rate_hz
+        self.rider = rider or SimulatedRider()
+        self._assembler = None
+        self._t0 = self._next_due = None
+
+    def open(self):
+        self._assembler = EvdevFrameAssembler(self.stats)
+        self._t0 = self._next_due = time.monotonic()
+        log.info(f"Synthetic balance board running at {self.rate_hz:g} Hz.")
+
+    def _events(self, t):
+        button, kg = self.rider.sample(t)
+        for idx, code in enumerate((ABS_HAT1X, ABS_HAT0X, ABS_HAT1Y, ABS_HAT0Y)):
+            yield EV_ABS, code, int(kg[idx] * 100)
+        yield EV_KEY, BTN_A, int(button)
+        yield EV_SYN, SYN_REPORT, 0
+
+    def read(self, timeout=None):
+        now = time.monotonic()
+        wait = self._next_due - now
+        if wait > 0:
+            if timeout is not None and wait > timeout:
+                time.sleep(timeout)
+                return []
+            time.sleep(wait)
+            now = time.monotonic()
+        samples = []
+        feed = self._assembler.feed
+        period = 1.0 / self.rate_hz
+        offset = time.time() - now
+        while self._next_due <= now:
+            t = self._next_due
+            for ev_type, code, value in self._events(t - self._t0):
+                sample = feed(ev_type, code, value, t + offset)
+                if sample:
+                    samples.append(sample)
+            self._next_due += period
+        return samples
+
+
+def synthetic_wiimote_backend(rate_hz=100.0, index=0, cache=None):
+    """HidapiBackend wired to a FakeWiimote, covering init, calibration and 0x34 decoding."""
+    path = b"fake%d" % index
+    return HidapiBackend(
+        device_factory=lambda: FakeWiimote(rate_hz),
+        enumerate_devices=lambda: [{"path": path, "product_string": "Fake Balance Board"}],
+        cache=cache,
+    )
+
 
-    def _ensure_vjoy_device(device_id=VJOY_DEVICE_ID):
+### --- Axis mapping ---
+# Which frame value drives which joystick axis, and through what response
+# curve. A mapping is a dict of axis name -> settings (the JSON of a
+# --mapping file). Each curve is evaluated once, into a lookup table over
+# the device's own units, so per sample an axis costs one multiply and one
+# index.
+MAP_AXES = ("x", "y", "z", "rx", "ry", "rz", "throttle")
+# Bipolar sources span -1..1 and rest at the centre; the others span 0..1
+# and rest at the minimum. Sensor sources are each sensor's share of the
+# total, "total" is the weight relative to ``max_lbs``.
+AXIS_SOURCES = ("cop_x", "cop_y", "tl", "tr", "bl", "br", "total")
+BIPOLAR_SOURCES = ("cop_x", "cop_y")
+AXIS_SETTINGS = {
+    "source": None,  # one of AXIS_SOURCES; required
+    "deadzone": 0.0,  # inputs below this magnitude stay at rest...
+    "saturation": 1.0,  # ...and reach full deflection at this one
+    "expo": 0.0,  # 0 linear .. 1 cubic: finer control near rest
+    "invert": False,
+    "max_lbs": 330.0,  # "total" only: weight at full deflection (the board's 150 kg limit)
+}
+DEFAULT_MAPPING = {"x": {"source": "cop_x"}, "y": {"source": "cop_y"}}
+# --sensor-axes: normalized pressure per sensor, and the total weight
+SENSOR_MAPPING = {
+    "rx": {"source": "tl"},
+    "ry": {"source": "tr"},
+    "z": {"source": "bl"},
+    "rz": {"source": "br"},
+    "throttle": {"source": "total"},
+}
+AXIS_LUT_MAX = 32768  # table entries per axis at most; vJoy's full range
+
+
+def check_mapping(mapping):
+    """Validate a mapping and fill in defaults; raises ValueError on bad settings."""
+    if not isinstance(mapping, dict) or not mapping:
+        raise ValueError("an axis mapping must be a non-empty object of axis name -> settings")
+    checked = {}
+    for name, settings in mapping.items():
+        if name not in MAP_AXES:
+            raise ValueError(f"unknown axis {name!r}; expected one of {', '.join(MAP_AXES)}")
+        if not isinstance(settings, dict):
+            raise ValueError(f"axis {name}: settings must be an object")
+        unknown = set(settings) - set(AXIS_SETTINGS)
+        if unknown:
+            raise ValueError(f"axis {name}: unknown settings {', '.join(sorted(unknown))}")
+        axis = {**AXIS_SETTINGS, **settings}
+        if axis["source"] not in AXIS_SOURCES:
+            raise ValueError(f"axis {name}: source must be one of {', '.join(AXIS_SOURCES)}")
         try:
-            j = pyvjoy.VJoyDevice(device_id)
-            j.reset()
-            # Center axes once to validate the device is usable.
-            j.set_axis(pyvjoy.HID_USAGE_X, VJOY_CENTER)
-            j.set_axis(pyvjoy.HID_USAGE_Y, VJOY_CENTER)
-            return j
-        except pyvjoy.exceptions.vJoyException:
+            for key in ("deadzone", "saturation", "expo", "max_lbs"):
+                axis[key] = float(axis[key])
+        except (TypeError, ValueError):
+            raise ValueError(f"axis {name}: {key} must be a number") from None
+        if not 0.0 <= axis["deadzone"] < axis["saturation"] <= 1.0:
+            raise ValueError(f"axis {name}: need 0 <= deadzone < saturation <= 1")
+        if not 0.0 <= axis["expo"] <= 1.0 or axis["max_lbs"] <= 0.0:
+            raise ValueError(f"axis {name}: need 0 <= expo <= 1 and max_lbs > 0")
+        axis["invert"] = bool(axis["invert"])
+        checked[name] = axis
+    return checked
+
+
+def load_mapping(path):
+    import json
+
+    try:
+        with open(path) as f:
+            mapping = json.load(f)
+    except OSError as e:
+        raise ValueError(f"cannot read axis mapping {path}: {e.strerror}") from None
+    except ValueError as e:
+        raise ValueError(f"axis mapping {path} is not valid JSON: {e}") from None
+    return check_mapping(mapping)
+
+
+def _axis_curve(axis, value):
+    """Response of one axis to ``value`` in its source range, in -1..1 (bipolar) or 0..1."""
+    magnitude = abs(value)
+    deadzone, saturation, expo = axis["deadzone"], axis["saturation"], axis["expo"]
+    u = min(1.0, max(0.0, (magnitude - deadzone) / (saturation - deadzone)))
+    u = (1.0 - expo) * u + expo * u * u * u
+    if axis["source"] in BIPOLAR_SOURCES:
+        return -u if (value < 0) != axis["invert"] else u
+    return 1.0 - u if axis["invert"] else u
+
+
+class AxisMapper:
+    """A checked mapping compiled into lookup tables for one device range.
+
+    Each table has one entry per device value (up to AXIS_LUT_MAX), so the
+    lookup loses no resolution the device could show. quantize(frame)
+    returns the device value of every axis in ``names`` order; nobody on
+    the board gives every axis its rest value.
+    """
+
+    def __init__(self, mapping, lo, hi):
+        self.names = tuple(mapping)
+        self._axes = []
+        rest = []
+        size = min(hi - lo + 1, AXIS_LUT_MAX)
+        last = size - 1
+        for name in self.names:
+            axis = mapping[name]
+            source = axis["source"]
+            bipolar = source in BIPOLAR_SOURCES
+            start = -1.0 if bipolar else 0.0
+            step = (1.0 - start) / last
+            table = array("i")
+            for i in range(size):
+                u = _axis_curve(axis, start + i * step)
+                if bipolar:
+                    u = (u + 1.0) / 2.0
+                table.append(max(lo, min(hi, int(lo + u * (hi - lo)))))
+            # index = int(value * scale + offset), rounding to the nearest entry
+            scale = 1.0 / step
+            if source == "total":
+                scale /= axis["max_lbs"]
+            self._axes.append((AXIS_SOURCES.index(source), scale, 0.5 - start / step, table, last))
+            rest.append(table[int(0.5 - start / step)])
+        self.rest = tuple(rest)
+        self._cop_only = all(source < 2 for source, *_ in self._axes)
+
+    def quantize(self, frame):
+        if not frame.active:
+            return self.rest
+        if self._cop_only:
+            values = (frame.cop_x, frame.cop_y)
+        else:
+            total = frame.total
+            inv_total = 1.0 / total  # sensor shares: weight * scale / total
+            tl, tr, bl, br = frame.weights
+            values = (frame.cop_x, frame.cop_y, tl * inv_total, tr * inv_total, bl * inv_total, br * inv_total, total)
+        out = []
+        for source, scale, offset, table, last in self._axes:
+            index = int(values[source] * scale + offset)
+            out.append(table[index if index < last else last])
+        return tuple(out)
+
+
+### --- Output sinks ---
+class OutputSink:
+    """Receives every published frame and button change; the base class discards them.
+
+    Sinks that hold back output implement pending_timeout() and poll(): the
+    reader wakes up no later than pending_timeout() seconds and calls poll().
+    """
+
+    stats = ReaderStats()  # replaced by the board's own through attach_stats()
+
+    def attach_stats(self, stats):
+        self.stats = stats
+
+    def emit(self, frame):
+        pass
+
+    def button(self, pressed):
+        pass
+
+    def pending_timeout(self):
+        return None
+
+    def poll(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class JoystickSink(OutputSink):
+    """Shared output scheduling for the virtual joysticks.
+
+    Frames are quantized to device units and only written when a value
+    changes. With ``rate_hz`` set, axis updates are coalesced to at most that
+    rate (the newest frame wins); button changes go out with the next frame,
+    never coalesced. Changed axes and buttons are written together in one
+    device update. Buttons are a bit mask: bit 0 is the board's A button,
+    bit n + 1 is GESTURES[n]. Axes follow ``mapping`` (DEFAULT_MAPPING: CoP
+    to X/Y), compiled for the device range AXIS_RANGE.
+    """
+
+    DEBUG_INTERVAL = 0.5  # seconds between debug log lines of output values
+    AXIS_RANGE = (0, 255)
+
+    def __init__(self, rate_hz=None, mapping=None):
+        self.mapper = AxisMapper(check_mapping(mapping or DEFAULT_MAPPING), *self.AXIS_RANGE)
+        self._quantize = self.mapper.quantize
+        self.period = 1.0 / rate_hz if rate_hz else 0.0
+        self._frame = None
+        self._buttons = 0
+        self._last_axes = None
+        self._last_buttons = 0
+        self._next_due = 0.0
+        self._next_debug = 0.0
+
+    def _write(self, axes, last_axes, buttons, changed):
+        raise NotImplementedError
+
+    def emit(self, frame):
+        self._frame = frame
+        self._buttons = (frame.gestures << 1) | (self._buttons & 1)
+        # Button and gesture changes bypass rate coalescing.
+        if self._buttons != self._last_buttons or not self.period or time.monotonic() >= self._next_due:
+            self.flush()
+
+    def button(self, pressed):
+        # Written by the emit() of the same sample, in one update with its axes.
+        self._buttons = (self._buttons & ~1) | int(pressed)
+
+    def pending_timeout(self):
+        if self._frame is None:
             return None
+        return max(0.0, self._next_due - time.monotonic())
+
+    def poll(self):
+        if self._frame is not None and time.monotonic() >= self._next_due:
+            self.flush()
+
+    def flush(self):
+        frame = self._frame
+        self._frame = None
+        axes = self._last_axes if frame is None else self._quantize(frame)
+        if axes is None:
+            return
+        if self.period:
+            self._next_due = time.monotonic() + self.period
+        buttons = self._buttons
+        changed = buttons ^ self._last_buttons
+        if axes == self._last_axes and not changed:
+            self.stats.hid_skipped += 1
+            return
+
+        self._write(axes, self._last_axes, buttons, changed)
+        self._last_axes = axes
+        self._last_buttons = buttons
+        self.stats.hid_writes += 1
+
+        if log.isEnabledFor(logging.DEBUG):
+            now = time.monotonic()
+            if now >= self._next_debug:
+                self._next_debug = now + self.DEBUG_INTERVAL
+                log.debug("Joystick axes %s buttons %#x", axes, buttons)
+
+
+# python-uinput event identifiers are (type, code) pairs
+UI_ABS_X = (EV_ABS, 0x00)
+UI_ABS_Y = (EV_ABS, 0x01)
+UI_AXES = {
+    "x": UI_ABS_X,
+    "y": UI_ABS_Y,
+    "z": (EV_ABS, 0x02),
+    "rx": (EV_ABS, 0x03),
+    "ry": (EV_ABS, 0x04),
+    "rz": (EV_ABS, 0x05),
+    "throttle": (EV_ABS, 0x06),
+}
+UI_BTN_A = (EV_KEY, BTN_A)
+# A, then one button per gesture: BTN_B (0x131) through BTN_SELECT (0x13a)
+UI_BUTTONS = tuple((EV_KEY, BTN_A + i) for i in range(1 + len(GESTURES)))
+
+
+class UinputSink(JoystickSink):
+    """Virtual joystick on Linux via /dev/uinput."""
+
+    def __init__(self, name="Wii Balance Board HID", device=None, rate_hz=None, gestures=False, mapping=None):
+        super().__init__(rate_hz, mapping)
+        self.axes = tuple(UI_AXES[axis] for axis in self.mapper.names)
+        if device is None:
+            import uinput
+
+            events = [
+                *(axis + self.AXIS_RANGE + (0, 0) for axis in self.axes),
+                *(UI_BUTTONS if gestures else (UI_BTN_A,)),
+            ]
+            device = uinput.Device(events, name=name)
+        self.device = device
+
+    def _write(self, axes, last_axes, buttons, changed):
+        # Queue every change without a SYN_REPORT, then sync once.
+        emit = self.device.emit
+        for i, value in enumerate(axes):
+            if last_axes is None or value != last_axes[i]:
+                emit(self.axes[i], value, syn=False)
+        i = 0
+        while changed:
+            if changed & 1:
+                emit(UI_BUTTONS[i], buttons >> i & 1, syn=False)
+            changed >>= 1
+            i += 1
+        self.device.syn()
+
+    def close(self):
+        self.device.destroy()
+
+
+VJOY_DEVICE_ID = 1
+# vJoy axis range: 0x1 to 0x8000 (1 to 32768), center = 0x4000 (16384)
+VJOY_MIN = 0x1
+VJOY_MAX = 0x8000
+VJOY_CENTER = 0x4000
+HID_USAGE_X = 0x30
+HID_USAGE_Y = 0x31
+# axis name -> (HID usage, field of pyvjoy's JOYSTICK_POSITION struct)
+VJOY_AXES = {
+    "x": (HID_USAGE_X, "wAxisX"),
+    "y": (HID_USAGE_Y, "wAxisY"),
+    "z": (0x32, "wAxisZ"),
+    "rx": (0x33, "wAxisXRot"),
+    "ry": (0x34, "wAxisYRot"),
+    "rz": (0x35, "wAxisZRot"),
+    "throttle": (0x36, "wSlider"),
+}
+
+
+class VJoySink(JoystickSink):
+    """Virtual joystick on Windows via the vJoy driver."""
+
+    AXIS_RANGE = (VJOY_MIN, VJOY_MAX)
+
+    def __init__(
+        self, device_id=VJOY_DEVICE_ID, max_wait=10.0, interval=1.0, joystick=None, rate_hz=None, mapping=None
+    ):
+        super().__init__(rate_hz, mapping)
+        self.usages = tuple(VJOY_AXES[name][0] for name in self.mapper.names)
+        self.fields = tuple(VJOY_AXES[name][1] for name in self.mapper.names)
+        self.device_id = device_id
+        self.joystick = joystick
+        try:
+            import pyvjoy
+        except ImportError:
+            if joystick is None:
+                raise
+            pyvjoy = None  # driving a caller-supplied stand-in
+        self._pyvjoy = pyvjoy
+        self._vjoy_error = pyvjoy.exceptions.vJoyException if pyvjoy else ()
+        if joystick is not None:
+            return
 
-    def create_virtual_joystick(max_wait=10.0, interval=1.0):
         start = time.time()
         attempt = 1
         while time.time() - start < max_wait:
-            j = _ensure_vjoy_device()
-            if j:
-                return j
-            print(
+            self.joystick = self._ensure_vjoy_device()
+            if self.joystick:
+                return
+            log.warning(
                 f"vJoy device not available (attempt {attempt}). "
-                "Open vJoyConf, ensure device 1 exists with X/Y axes enabled, "
+                f"Open vJoyConf, ensure device {device_id} exists with the "
+                f"{'/'.join(name.upper() for name in self.mapper.names)} axes enabled, "
                 "then keep this app running—will retry."
             )
             attempt += 1
             time.sleep(interval)
         raise SystemExit("vJoy device missing; configure it in vJoyConf and rerun.")
 
-    def send_hid_output(j):
-        adjusted = _get_adjusted_data()
-        total_weight = sum(adjusted)
-        if not exact_mode and total_weight <= 5:
-            total_weight = 0.0000000001  # Prevent divide-by-zero while idle
-        elif total_weight <= 0:
-            total_weight = 0.0000000001
-
-        top = adjusted[0] + adjusted[1]
-        bottom = adjusted[2] + adjusted[3]
-        left = adjusted[0] + adjusted[2]
-        right = adjusted[1] + adjusted[3]
-
-        # Match red dot direction
-        x = (right - left) / total_weight
-        y = (top - bottom) / total_weight
-
-        # Clamp to range [-1, 1]
-        x = max(-1.0, min(1.0, x))
-        y = max(-1.0, min(1.0, y))
-
-        # Convert to vJoy range [0x1, 0x8000] where 0x4000 is center
-        joy_x = _clamp_axis(int((x + 1.0) / 2.0 * (VJOY_MAX - VJOY_MIN) + VJOY_MIN))
-        joy_y = _clamp_axis(int((y + 1.0) / 2.0 * (VJOY_MAX - VJOY_MIN) + VJOY_MIN))
+    def _ensure_vjoy_device(self):
+        if self._pyvjoy is None:
+            return None
+        try:
+            j = self._pyvjoy.VJoyDevice(self.device_id)
+            j.reset()
+            # Put every axis at rest once to validate the device is usable.
+            for usage, value in zip(self.usages, self.mapper.rest):
+                j.set_axis(usage, value)
+            return j
+        except self._vjoy_error:
+            return None
 
+    def _update(self, axes, last_axes, buttons, changed):
+        j = self.joystick
+        data = getattr(j, "data", None)
+        if data is not None:
+            # pyvjoy keeps the whole device state in one struct; a single
+            # UpdateVJD call replaces one DLL call per axis and button.
+            for field, value in zip(self.fields, axes):
+                setattr(data, field, value)
+            data.lButtons = buttons  # button n is bit n - 1
+            j.update()
+            return
+        for i, value in enumerate(axes):
+            if last_axes is None or value != last_axes[i]:
+                j.set_axis(self.usages[i], value)
+        i = 0
+        while changed:
+            if changed & 1:
+                j.set_button(i + 1, buttons >> i & 1)
+            changed >>= 1
+            i += 1
+
+    def _write(self, axes, last_axes, buttons, changed):
         try:
-            j.set_axis(pyvjoy.HID_USAGE_X, joy_x)
-            j.set_axis(pyvjoy.HID_USAGE_Y, joy_y)
-        except pyvjoy.exceptions.vJoyException:
-            print(
+            self._update(axes, last_axes, buttons, changed)
+        except self._vjoy_error:
+            log.warning(
                 "vJoy rejected axis update. Attempting to reinitialize vJoy device..."
             )
-            new_j = _ensure_vjoy_device()
+            self.stats.vjoy_reinits += 1
+            new_j = self._ensure_vjoy_device()
             if new_j:
-                joystick_handle = new_j
-                joystick_handle.set_axis(pyvjoy.HID_USAGE_X, joy_x)
-                joystick_handle.set_axis(pyvjoy.HID_USAGE_Y, joy_y)
-                return joystick_handle
-            print(
-                "vJoy still unavailable. Verify vJoy service is running and device has X/Y axes enabled."
+                self.joystick = new_j
+                self._update(axes, None, buttons, buttons | 1)
+                return
+            log.error(
+                "vJoy still unavailable. Verify vJoy service is running and device has the mapped axes enabled."
             )
             raise
 
-    # -- Wiimote HID protocol helpers --
 
-    def _pad_report(data, size=22):
-        """Pad an output report to the Wiimote output report size."""
-        return data + [0x00] * (size - len(data))
+### --- Network streaming ---
+# Every frame goes out as one fixed-size datagram, so any number of local
+# tools can subscribe at full rate. Sends never block: when a socket buffer
+# is full the datagram is dropped and counted instead of stalling the reader.
+STREAM_MAGIC = b"WBBF"
+STREAM_VERSION = 2
+# magic, version, board, flags (bit 0 button, bit 1 active, bits 2.. the
+# GESTURES bits, bit 15 stable), sequence, timestamp, TL, TR, BL, BR,
+# total (lbs), CoP x, CoP y, settled weight (lbs, 0 until stable);
+# 52 bytes, little-endian
+STREAM_FRAME = struct.Struct("<4sBBHId8f")
+STREAM_BUTTON = 0x01
+STREAM_ACTIVE = 0x02
+STREAM_GESTURE_SHIFT = 2
+STREAM_STABLE = 0x8000  # top bit, leaving the bits in between for more gestures
+
+
+def _stream_flags(frame):
+    return (
+        (STREAM_BUTTON if frame.button else 0)
+        | (STREAM_ACTIVE if frame.active else 0)
+        | frame.gestures << STREAM_GESTURE_SHIFT
+        | (STREAM_STABLE if frame.settled else 0)
+    )
 
-    def _write_register(board, address, data_bytes):
-        """Write data to a Wiimote register (report 0x16)."""
-        addr = [(address >> 16) & 0xFF, (address >> 8) & 0xFF, address & 0xFF]
-        report = [0x16, 0x04] + addr + [len(data_bytes)] + list(data_bytes)
-        board.write(_pad_report(report))
 
-    def _read_register(board, address, size):
-        """Request a read from a Wiimote register (report 0x17)."""
-        addr = [(address >> 16) & 0xFF, (address >> 8) & 0xFF, address & 0xFF]
-        size_bytes = [(size >> 8) & 0xFF, size & 0xFF]
-        report = [0x17, 0x04] + addr + size_bytes
-        board.write(_pad_report(report))
+def decode_stream_frame(data):
+    """Frame from a WBBF datagram (``raw`` is None: only processed values are sent)."""
+    magic, version, board, flags, _, timestamp, tl, tr, bl, br, total, x, y, settled = STREAM_FRAME.unpack_from(data)
+    if magic != STREAM_MAGIC or version != STREAM_VERSION:
+        raise ValueError("not a balance board stream frame")
+    return Frame(
+        timestamp,
+        None,
+        (tl, tr, bl, br),
+        total,
+        x,
+        y,
+        bool(flags & STREAM_ACTIVE),
+        bool(flags & STREAM_BUTTON),
+        board,
+        (flags & ~STREAM_STABLE) >> STREAM_GESTURE_SHIFT,
+        settled,
+    )
 
-    def _wait_for_report(board, report_id, timeout=2.0):
-        """Read until a specific input report arrives, or timeout."""
-        board.set_nonblocking(True)
-        start = time.time()
-        while time.time() - start < timeout:
-            data = board.read(64)
-            if data and data[0] == report_id:
-                board.set_nonblocking(False)
-                return data
-            time.sleep(0.01)
-        board.set_nonblocking(False)
+
+def parse_stream_url(url):
+    """``udp://host:port`` or ``osc://host:port`` -> (scheme, (host, port))."""
+    scheme, sep, rest = url.partition("://")
+    host, _, port = rest.rpartition(":")
+    if not sep or scheme not in STREAM_SINKS or not host or not port.isdigit():
+        raise ValueError(f"bad stream target {url!r}; expected udp://HOST:PORT or osc://HOST:PORT")
+    return scheme, (host.strip("[]"), int(port))
+
+
+class UdpStreamSink(OutputSink):
+    """Publishes every frame as a fixed-layout datagram to UDP unicast or multicast targets."""
+
+    FRAME = STREAM_FRAME
+    HEADER = b""  # constant bytes in front of the packed values
+
+    def __init__(self, targets, ttl=1):
+        import socket
+
+        self.socks = {}  # address family -> socket, so IPv4 and IPv6 targets can be mixed
+        self.targets = []  # (sendto, address)
+        for host, port in targets:
+            family, address = self._resolve(socket, host, port)
+            sock = self.socks.get(family)
+            if sock is None:
+                sock = self.socks[family] = socket.socket(family, socket.SOCK_DGRAM)
+                sock.setblocking(False)
+                # Only takes effect for multicast targets; keep them on the local network.
+                if family == socket.AF_INET:
+                    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+                elif family == socket.AF_INET6:
+                    sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_MULTICAST_HOPS, ttl)
+            self.targets.append((sock.sendto, address))
+        self.buffer = bytearray(self.HEADER) + bytearray(self.FRAME.size)
+        self.seq = 0
+
+    @staticmethod
+    def _resolve(socket, host, port):
+        family, _, _, _, address = socket.getaddrinfo(host, port, type=socket.SOCK_DGRAM)[0]
+        return family, address
+
+    def _pack(self, frame):
+        flags = _stream_flags(frame)
+        tl, tr, bl, br = frame.weights
+        STREAM_FRAME.pack_into(
+            self.buffer,
+            0,
+            STREAM_MAGIC,
+            STREAM_VERSION,
+            frame.board,
+            flags,
+            self.seq,
+            frame.timestamp,
+            tl,
+            tr,
+            bl,
+            br,
+            frame.total,
+            frame.cop_x,
+            frame.cop_y,
+            frame.settled,
+        )
+
+    def emit(self, frame):
+        self.seq = (self.seq + 1) & 0xFFFFFFFF
+        self._pack(frame)
+        buffer, stats = self.buffer, self.stats
+        for sendto, address in self.targets:
+            try:
+                sendto(buffer, address)
+                stats.stream_sent += 1
+            except OSError:
+                # Full socket buffer, or an ICMP error from a closed port
+                # reported on a later send: this subscriber misses a frame.
+                stats.stream_dropped += 1
+
+    def close(self):
+        for sock in self.socks.values():
+            sock.close()
+
+
+class OscStreamSink(UdpStreamSink):
+    """The same frames as an OSC message, for OSC-speaking tools.
+
+    Address ``/wiibalance/frame`` with arguments board, sequence, flags (i,
+    bits as in STREAM_FRAME), timestamp (d) and TL, TR, BL, BR, total,
+    CoP x, CoP y, settled weight (f). The address and type tags never
+    change, so the message has a fixed layout too.
+    """
+
+    HEADER = b"/wiibalance/frame\0\0\0" + b",iiidffffffff\0\0\0"
+    FRAME = struct.Struct(">iiid8f")
+
+    def _pack(self, frame):
+        flags = _stream_flags(frame)
+        tl, tr, bl, br = frame.weights
+        self.FRAME.pack_into(
+            self.buffer,
+            len(self.HEADER),
+            frame.board,
+            self.seq & 0x7FFFFFFF,
+            flags,
+            frame.timestamp,
+            tl,
+            tr,
+            bl,
+            br,
+            frame.total,
+            frame.cop_x,
+            frame.cop_y,
+            frame.settled,
+        )
+
+
+STREAM_SINKS = {"udp": UdpStreamSink, "osc": OscStreamSink}
+
+
+class MultiSink(OutputSink):
+    """Fans frames and button changes out to several sinks (joystick plus streams)."""
+
+    def __init__(self, sinks):
+        self.sinks = list(sinks)
+
+    def attach_stats(self, stats):
+        for sink in self.sinks:
+            sink.attach_stats(stats)
+
+    def emit(self, frame):
+        for sink in self.sinks:
+            sink.emit(frame)
+
+    def button(self, pressed):
+        for sink in self.sinks:
+            sink.button(pressed)
+
+    def pending_timeout(self):
+        timeouts = [t for t in (sink.pending_timeout() for sink in self.sinks) if t is not None]
+        return min(timeouts) if timeouts else None
+
+    def poll(self):
+        for sink in self.sinks:
+            sink.poll()
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+### --- Shared-memory ring ---
+# Frames are also written into a memory-mapped file that other processes on
+# this machine map and read directly: no syscall or copy per sample, and
+# heavy consumers run under their own GIL. The file is a header followed by
+# RING_SLOTS fixed-size slots; frame n (counting from 1) lives in slot
+# n % slots. Each slot starts with its own sequence number, set to 0 while
+# the slot is being written, so readers detect torn reads and retry.
+RING_MAGIC = b"WBBRING1"
+RING_HEADER = struct.Struct("<8sIIQB")  # magic, slots, slot size, last written seq, board
+RING_HEADER_SIZE = 64  # header padded so slots start cache-line aligned
+RING_SEQ = struct.Struct("<Q")
+RING_SEQ_OFFSET = 16  # last written seq in the header
+# seq, timestamp, TL, TR, BL, BR, total, CoP x, CoP y, settled weight,
+# button, active, gestures
+RING_SLOT = struct.Struct("<Qd8dBBH4x")
+RING_SLOTS = 1024
+
+
+def default_ring_path():
+    import tempfile
+
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "wiibalance.ring")
+
+
+class ShmRingSink(OutputSink):
+    """Writes every frame into the shared-memory ring at ``path``."""
+
+    def __init__(self, path=None, slots=RING_SLOTS, board=0):
+        self.path = path or default_ring_path()
+        self.slots = slots
+        size = RING_HEADER_SIZE + slots * RING_SLOT.size
+        with open(self.path, "w+b") as f:
+            f.truncate(size)
+            self.map = mmap.mmap(f.fileno(), size)
+        RING_HEADER.pack_into(self.map, 0, RING_MAGIC, slots, RING_SLOT.size, 0, board)
+        self.seq = 0
+        log.info(f"Publishing frames to shared memory at {self.path}.")
+
+    def emit(self, frame):
+        seq = self.seq = self.seq + 1
+        offset = RING_HEADER_SIZE + (seq % self.slots) * RING_SLOT.size
+        tl, tr, bl, br = frame.weights
+        m = self.map
+        # Slot seq 0 marks the slot as being written until the final store.
+        RING_SLOT.pack_into(
+            m,
+            offset,
+            0,
+            frame.timestamp,
+            tl,
+            tr,
+            bl,
+            br,
+            frame.total,
+            frame.cop_x,
+            frame.cop_y,
+            frame.settled,
+            frame.button,
+            frame.active,
+            frame.gestures,
+        )
+        RING_SEQ.pack_into(m, offset, seq)
+        RING_SEQ.pack_into(m, RING_SEQ_OFFSET, seq)
+
+    def close(self):
+        self.map.close()
+
+
+class RingReader:
+    """Reads frames from a ShmRingSink ring, in this or any other process.
+
+    ``latest()`` returns the newest frame, ``last(n)`` the newest ``n`` in
+    order, and ``since(seq)`` everything written after ``seq`` together with
+    the new position, for consumers that follow the stream. Frames come
+    back with ``raw`` set to None. A consumer that falls more than the ring
+    size behind silently skips the overwritten frames.
+    """
+
+    RETRIES = 8
+
+    def __init__(self, path=None):
+        self.path = path or default_ring_path()
+        with open(self.path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.slots, slot_size, _, self.board = RING_HEADER.unpack_from(self.map)
+        if magic != RING_MAGIC or slot_size != RING_SLOT.size:
+            raise ValueError(f"{self.path} is not a balance board ring")
+
+    @property
+    def seq(self):
+        """Sequence number of the newest frame (0 before the first one)."""
+        return RING_SEQ.unpack_from(self.map, RING_SEQ_OFFSET)[0]
+
+    def _read(self, seq):
+        offset = RING_HEADER_SIZE + (seq % self.slots) * RING_SLOT.size
+        values = RING_SLOT.unpack_from(self.map, offset)
+        # A changed slot seq after the copy means the writer got there meanwhile.
+        if values[0] != seq or RING_SEQ.unpack_from(self.map, offset)[0] != seq:
+            return None  # overwritten by a newer frame, or not written yet
+        _, timestamp, tl, tr, bl, br, total, x, y, settled, button, active, gestures = values
+        return Frame(
+            timestamp, None, (tl, tr, bl, br), total, x, y, bool(active), bool(button), self.board, gestures, settled
+        )
+
+    def latest(self):
+        for _ in range(self.RETRIES):
+            seq = self.seq
+            if seq == 0:
+                return None
+            frame = self._read(seq)
+            if frame is not None:
+                return frame
         return None
 
-    def _read_calibration(board):
-        """Read calibration data from the balance board extension registers."""
-        global calibration
-        cal_raw = bytearray(32)
-
-        # First chunk: 16 bytes from 0xA40024
-        _read_register(board, 0xA40024, 0x10)
-        resp = _wait_for_report(board, 0x21)
-        if resp:
-            n = ((resp[3] >> 4) & 0x0F) + 1
-            cal_raw[0:n] = bytes(resp[6 : 6 + n])
-
-        # Second chunk: 8 bytes from 0xA40034
-        _read_register(board, 0xA40034, 0x08)
-        resp = _wait_for_report(board, 0x21)
-        if resp:
-            n = ((resp[3] >> 4) & 0x0F) + 1
-            cal_raw[16 : 16 + n] = bytes(resp[6 : 6 + n])
-
-        # Parse: 3 groups (0 kg, 17 kg, 34 kg) × 4 sensors × 2 bytes BE
-        sensors = ["TR", "BR", "TL", "BL"]
-        for group in range(3):
-            for i, sensor in enumerate(sensors):
-                offset = group * 8 + i * 2
-                val = (cal_raw[offset] << 8) | cal_raw[offset + 1]
-                if val != 0:
-                    calibration[sensor][group] = val
-
-        print(f"Calibration loaded: {calibration}")
-
-    def _calc_weight(raw_val, sensor):
-        """Convert a raw sensor value to pounds using calibration data."""
-        cal = calibration[sensor]
-        if raw_val < cal[1]:
-            if cal[1] == cal[0]:
-                return 0.0
-            kg = 17.0 * (raw_val - cal[0]) / (cal[1] - cal[0])
-        else:
-            if cal[2] == cal[1]:
-                return 17.0 * 2.20462
-            kg = 17.0 + 17.0 * (raw_val - cal[1]) / (cal[2] - cal[1])
-        return max(0.0, kg * 2.20462)
+    def since(self, seq):
+        """Frames written after ``seq``, and the sequence number to pass next time."""
+        newest = self.seq
+        start = max(seq + 1, newest - self.slots + 2)  # the oldest slot may be mid-write
+        frames = [frame for frame in map(self._read, range(start, newest + 1)) if frame is not None]
+        return frames, newest
 
-    def start_board_reader():
-        global joystick, aButton
+    def last(self, n):
+        return self.since(max(0, self.seq - n))[0]
 
-        joystick = create_virtual_joystick()
-        send_hid_output(joystick)
+    def close(self):
+        self.map.close()
 
-        print("Waiting for balance board (Windows)...")
-        print("Make sure the board is paired via Bluetooth and press the sync button.")
 
-        board = None
-        while board is None:
-            for dev_info in hid.enumerate(NINTENDO_VID, BALANCE_BOARD_PID):
-                try:
-                    board = hid.device()
-                    board.open_path(dev_info["path"])
-                    board.set_nonblocking(False)
-                    name = dev_info.get("product_string", "Wii Balance Board")
-                    print(f"Found: {name}")
-                    break
-                except Exception as e:
-                    print(f"Could not open device: {e}")
-                    board = None
-            if board is None:
-                time.sleep(1.0)
+### --- Sway analytics ---
+# Postural sway metrics over a sliding time window of the CoP, kept up to
+# date per sample in O(1): running sums for means, variances and path
+# length, and monotonic deques for the ranges. Band power needs an FFT, so
+# it is computed on demand from the window, at most once per second.
+BOARD_WIDTH_CM = 43.3  # left-right distance between the sensors
+BOARD_DEPTH_CM = 23.8  # front-back distance between the sensors
+ELLIPSE_95_CHI2 = 5.991  # chi-square quantile for 2 degrees of freedom, p = 0.95
+SWAY_BANDS_HZ = ((0.0, 0.3), (0.3, 1.0), (1.0, 3.0))  # low, medium, high frequency sway
+SWAY_FFT_BLOCK = 1024  # newest samples used for band power
+SWAY_FFT_INTERVAL = 1.0  # seconds between band power updates
 
-        # Initialize the extension controller (new-style init)
-        _write_register(board, 0xA400F0, [0x55])
-        time.sleep(0.1)
-        _write_register(board, 0xA400FB, [0x00])
-        time.sleep(0.1)
 
-        # Read calibration data
-        _read_calibration(board)
+class _WindowMax:
+    """Maximum over a sliding time window (push negated values for the minimum)."""
 
-        # Set data reporting mode: continuous, 0x34 = buttons + 19 ext bytes
-        board.write(_pad_report([0x12, 0x04, 0x34]))
-        time.sleep(0.1)
+    def __init__(self):
+        self._q = collections.deque()  # (t, value), values decreasing
 
-        # Turn on LED 1 so user knows we're connected
-        board.write(_pad_report([0x11, 0x10]))
+    def push(self, t, value):
+        q = self._q
+        while q and q[-1][1] <= value:
+            q.pop()
+        q.append((t, value))
 
-        print("Balance board initialized, please step on.")
+    def expire(self, t_min):
+        q = self._q
+        while q and q[0][0] < t_min:
+            q.popleft()
 
-        board.set_nonblocking(False)
-        while True:
+    def value(self):
+        try:
+            return self._q[0][1]
+        except IndexError:
+            return None
+
+    def clear(self):
+        self._q.clear()
+
+
+class SwayAnalyzer(OutputSink):
+    """Sliding-window sway metrics of one board's CoP, in cm.
+
+    Fed like any sink; only frames with someone on the board count, and
+    stepping off starts a new window. snapshot() may be called from another
+    thread and returns None until the window holds two samples.
+    """
+
+    def __init__(self, window_s=30.0):
+        self.window_s = window_s
+        self._samples = collections.deque()  # (t, x, y, step from previous)
+        self._max_x, self._min_x, self._max_y, self._min_y = (_WindowMax() for _ in range(4))
+        self._band_power = None
+        self._band_at = 0.0
+        self.reset()
+
+    def reset(self):
+        self._samples.clear()
+        for extreme in (self._max_x, self._min_x, self._max_y, self._min_y):
+            extreme.clear()
+        self.n = 0
+        self.sum_x = self.sum_y = self.sum_xx = self.sum_yy = self.sum_xy = 0.0
+        self.path = 0.0  # sum of the steps of every sample in the window
+        self._last = None
+        self._band_power = None
+
+    def emit(self, frame):
+        if not frame.active:
+            if self.n:
+                self.reset()
+            return
+        t = frame.timestamp
+        x = frame.cop_x * (BOARD_WIDTH_CM / 2)  # medio-lateral
+        y = frame.cop_y * (BOARD_DEPTH_CM / 2)  # antero-posterior
+        last = self._last
+        step = math.hypot(x - last[0], y - last[1]) if last else 0.0
+        self._last = (x, y)
+
+        self._samples.append((t, x, y, step))
+        self.n += 1
+        self.sum_x += x
+        self.sum_y += y
+        self.sum_xx += x * x
+        self.sum_yy += y * y
+        self.sum_xy += x * y
+        self.path += step
+        self._max_x.push(t, x)
+        self._min_x.push(t, -x)
+        self._max_y.push(t, y)
+        self._min_y.push(t, -y)
+
+        t_min = t - self.window_s
+        samples = self._samples
+        while samples[0][0] < t_min:
+            _, ox, oy, ostep = samples.popleft()
+            self.n -= 1
+            self.sum_x -= ox
+            self.sum_y -= oy
+            self.sum_xx -= ox * ox
+            self.sum_yy -= oy * oy
+            self.sum_xy -= ox * oy
+            self.path -= ostep
+        for extreme in (self._max_x, self._min_x, self._max_y, self._min_y):
+            extreme.expire(t_min)
+
+    def snapshot(self):
+        n = self.n
+        try:
+            first, last = self._samples[0], self._samples[-1]
+        except IndexError:
+            return None
+        duration = last[0] - first[0]
+        if n < 2 or duration <= 0:
+            return None
+        mean_x, mean_y = self.sum_x / n, self.sum_y / n
+        var_x = max(0.0, self.sum_xx / n - mean_x * mean_x)
+        var_y = max(0.0, self.sum_yy / n - mean_y * mean_y)
+        cov_xy = self.sum_xy / n - mean_x * mean_y
+        path = self.path - first[3]  # the oldest step leads into the window
+        return {
+            "samples": n,
+            "duration_s": round(duration, 2),
+            "path_cm": round(path, 2),
+            "velocity_cm_s": round(path / duration, 3),
+            "rms_cm": round(math.sqrt(var_x + var_y), 3),
+            "rms_ml_cm": round(math.sqrt(var_x), 3),
+            "rms_ap_cm": round(math.sqrt(var_y), 3),
+            "ellipse95_cm2": round(math.pi * ELLIPSE_95_CHI2 * math.sqrt(max(0.0, var_x * var_y - cov_xy * cov_xy)), 3),
+            "range_ml_cm": round((self._max_x.value() or 0.0) + (self._min_x.value() or 0.0), 3),
+            "range_ap_cm": round((self._max_y.value() or 0.0) + (self._min_y.value() or 0.0), 3),
+            "band_power": self.band_power(),
+        }
+
+    def band_power(self):
+        """Detrended, Hann-windowed FFT power per SWAY_BANDS_HZ band and axis (cm²), or None."""
+        now = time.monotonic()
+        if now - self._band_at < SWAY_FFT_INTERVAL:
+            return self._band_power
+        self._band_at = now
+        try:
+            np = _import_numpy("sway band power")
+        except RuntimeError:
+            return None
+        block = list(self._samples)[-SWAY_FFT_BLOCK:]  # one C-level copy, safe against the reader
+        if len(block) < 64:
+            self._band_power = None
+            return None
+        data = np.array(block)
+        fs = (len(data) - 1) / (data[-1, 0] - data[0, 0])
+        window = np.hanning(len(data))
+        freqs = np.fft.rfftfreq(len(data), 1.0 / fs)
+        scale = 2.0 / (fs * (window * window).sum()) * (freqs[1] - freqs[0])
+        power = {}
+        for axis, column in (("ml", 1), ("ap", 2)):
+            values = data[:, column] - data[:, column].mean()
+            spectrum = np.abs(np.fft.rfft(values * window)) ** 2 * scale
+            for lo, hi in SWAY_BANDS_HZ:
+                band = (freqs > lo) & (freqs <= hi)
+                power[f"{axis}_{lo:g}-{hi:g}hz"] = round(float(spectrum[band].sum()), 5)
+        self._band_power = power
+        return power
+
+
+### --- Board reader ---
+INPUT_BACKENDS = {
+    "evdev": EvdevBackend,
+    "hidapi": HidapiBackend,
+    "synthetic": SyntheticBackend,
+    "synthetic-wiimote": synthetic_wiimote_backend,
+}
+OUTPUT_SINKS = {
+    "uinput": UinputSink,
+    "vjoy": VJoySink,
+    "none": OutputSink,
+}
+
+
+def default_backend_name():
+    return {"Linux": "evdev", "Windows": "hidapi"}.get(platform.system())
+
+
+def default_output_name():
+    return {"Linux": "uinput", "Windows": "vjoy"}.get(platform.system(), "none")
+
+
+READ_TIMEOUT = 0.5  # how often a blocked reader re-checks for shutdown
+POLL_INTERVAL = 0.002  # wake-up period when boards without a pollable fd share the loop
+
+
+class BoardSession:
+    """One board as served by the reader loop: backend, sink, state and capture."""
+
+    def __init__(self, backend, sink, state, record_path=None):
+        self.backend = backend
+        self.sink = sink
+        self.state = state
+        self.record_path = record_path
+        self.writer = None
+        backend.stats = state.stats
+        sink.attach_stats(state.stats)
+
+    def open(self):
+        self.sink.emit(self.state.frame)
+        self.backend.open()
+
+    def read(self, timeout):
+        """Read and process one batch; returns False once the input has finished."""
+        samples = self.backend.read(timeout)
+        if samples is None:
+            log.info(f"{self.state.label}: input finished.")
+            return False
+        if self.record_path and self.writer is None and samples:
+            # Opened on the first samples: a board connects in the background,
+            # and its calibration is only known once it reports.
+            self.writer = open_capture(self.record_path, self.backend.capture_source, self.backend.calibration)
+        perf = time.perf_counter_ns
+        t_read = perf()
+        state, sink, writer, decode = self.state, self.sink, self.writer, self.backend.decode
+        stats = state.stats
+        hist = stats.latency
+        decode_hist, filter_hist, emit_hist, total_hist = (hist[name] for name in ReaderStats.STAGES)
+        stats.samples_in += len(samples)
+        for sample in samples:
+            t0 = perf()
+            if writer:
+                writer.write(*sample)
+            timestamp, button, tl, tr, bl, br = sample
+            if button != state.button:
+                state.button = bool(button)
+                sink.button(state.button)
+            state.raw[:] = decode(tl, tr, bl, br)
+            t1 = perf()
+            frame = state.process_sample(timestamp)
+            t2 = perf()
+            sink.emit(frame)
+            t3 = perf()
+            decode_hist.record(t1 - t0)
+            filter_hist.record(t2 - t1)
+            emit_hist.record(t3 - t2)
+            total_hist.record(t3 - t_read)
+        stats.frames_out += len(samples)
+        stats.roll(t_read)
+        if self.backend.reset_pending:
+            self.backend.reset_pending = False
+            if state.button:
+                sink.button(False)
+            sink.emit(state.reset(time.time()))
+        return True
+
+    def close(self):
+        if self.writer:
+            self.writer.close()
+        self.backend.close()
+        self.sink.close()
+
+
+def serve_boards(sessions, stop=None):
+    """Serve every session from one loop until all inputs finish or ``stop`` is set.
+
+    Boards with a file descriptor (evdev) wait in a single selector; boards
+    without one (hidapi, replay, synthetic) are polled with read(0) every
+    POLL_INTERVAL. A lone unpollable board simply blocks in read().
+    """
+    stop = stop or threading.Event()
+    selector = selectors.DefaultSelector()
+    try:
+        for session in sessions:
+            session.open()
+        polled = []
+        for session in sessions:
+            fd = session.backend.fileno()
+            if fd is None:
+                polled.append(session)
+            else:
+                selector.register(fd, selectors.EVENT_READ, session)
+        live = len(sessions)
+
+        while live and not stop.is_set():
+            timeout = READ_TIMEOUT
+            for session in sessions:
+                pending = session.sink.pending_timeout()
+                if pending is not None:
+                    timeout = min(timeout, pending)
+
+            if live == 1 and polled:
+                if not polled[0].read(timeout):
+                    break
+            else:
+                ready = []
+                if selector.get_map():
+                    ready = [key.data for key, _ in selector.select(min(timeout, POLL_INTERVAL) if polled else timeout)]
+                elif polled:
+                    time.sleep(min(timeout, POLL_INTERVAL))
+                for session in ready:
+                    if not session.read(0):
+                        selector.unregister(session.backend.fileno())
+                        live -= 1
+                for session in list(polled):
+                    if not session.read(0):
+                        polled.remove(session)
+                        live -= 1
+            for session in sessions:
+                session.sink.poll()
+    finally:
+        selector.close()
+        for session in sessions:
             try:
-                data = board.read(64)
+                session.close()
             except Exception:
-                print("Board disconnected, attempting to reconnect...")
-                board = None
-                while board is None:
-                    for dev_info in hid.enumerate(NINTENDO_VID, BALANCE_BOARD_PID):
-                        try:
-                            board = hid.device()
-                            board.open_path(dev_info["path"])
-                            board.set_nonblocking(False)
-                            print("Reconnected!")
-                            board.write(_pad_report([0x12, 0x04, 0x34]))
-                            break
-                        except Exception:
-                            board = None
-                    if board is None:
-                        time.sleep(1.0)
-                continue
+                log.exception(f"Closing {session.state.label} failed")
 
-            if not data or len(data) < 12:
-                continue
 
-            report_id = data[0]
+def start_board_reader(backend, sink, record_path=None, stop=None, state=None):
+    """Run backend -> filter/frame -> sink until the backend runs dry or ``stop`` is set."""
+    serve_boards([BoardSession(backend, sink, state or boards[0], record_path)], stop)
 
-            if report_id == 0x34:
-                # Button data — A button is bit 3 of byte 2
-                new_a = bool(data[2] & 0x08)
-                if new_a != aButton:
-                    aButton = new_a
-                    joystick.set_button(1, int(aButton))
 
-                # Extension data: 4 sensors × 2 bytes big-endian starting at byte 3
-                tr = (data[3] << 8) | data[4]
-                br = (data[5] << 8) | data[6]
-                tl = (data[7] << 8) | data[8]
-                bl = (data[9] << 8) | data[10]
+### --- Pygame Visualizer ---
+def _import_pygame():
+    global pygame
+    if pygame is None:
+        import pygame as module
 
-                raw_data[0] = _calc_weight(tl, "TL")
-                raw_data[1] = _calc_weight(tr, "TR")
-                raw_data[2] = _calc_weight(bl, "BL")
-                raw_data[3] = _calc_weight(br, "BR")
+        pygame = module
+    return pygame
 
-                _update_filtered()
-                send_hid_output(joystick)
 
-            elif report_id == 0x20:
-                # Status report — re-set reporting mode (board resets after sync)
-                board.write(_pad_report([0x12, 0x04, 0x34]))
+ACTIVE_FPS = 30
+IDLE_AFTER_FRAMES = 30  # unchanged frames before the UI idles down
+IDLE_WAIT_MS = 200  # idle redraw check interval; input events still wake it at once
+PAD_RADIUS = 30
+DOT_RADIUS = 10
 
 
-### --- Pygame Visualizer ---
 def _layout_buttons(w, h, font, specs, max_cols=4):
     btn_w, btn_h = 140, 40
     spacing = 12
@@ -426,78 +2901,691 @@ def _layout_buttons(w, h, font, specs, max_cols=4):
     return layout
 
 
-def _draw_button(screen, font, label, rect, active=False, hover=False):
+class _TextCache:
+    """Rendered strings for fixed text, and per-glyph surfaces for changing numbers.
+
+    Readouts such as "12.34 lb" are drawn glyph by glyph from the cache, so a
+    steady-state frame never calls font.render().
+    """
+
+    MAX_STRINGS = 256
+
+    def __init__(self):
+        self._strings = {}
+        self._glyphs = {}
+
+    def render(self, font, text, color):
+        key = (id(font), text, color)
+        surf = self._strings.get(key)
+        if surf is None:
+            if len(self._strings) >= self.MAX_STRINGS:
+                self._strings.clear()
+            surf = self._strings[key] = font.render(text, True, color)
+        return surf
+
+    def _glyph(self, font, ch, color):
+        key = (id(font), ch, color)
+        surf = self._glyphs.get(key)
+        if surf is None:
+            surf = self._glyphs[key] = font.render(ch, True, color)
+        return surf
+
+    def size(self, font, text, color):
+        glyphs = [self._glyph(font, ch, color) for ch in text]
+        return sum(g.get_width() for g in glyphs), max((g.get_height() for g in glyphs), default=0)
+
+    def blit(self, screen, font, text, color, pos):
+        x, y = pos
+        for ch in text:
+            glyph = self._glyph(font, ch, color)
+            screen.blit(glyph, (x, y))
+            x += glyph.get_width()
+
+
+def _draw_button(screen, font, label, rect, active=False, hover=False, text_cache=None):
     color = BTN_COLOR_ACTIVE if active else BTN_COLOR_HOVER if hover else BTN_COLOR
     pygame.draw.rect(screen, color, rect, border_radius=8)
     pygame.draw.rect(screen, (0, 0, 0), rect, width=2, border_radius=8)
-    text = font.render(label, True, TEXT_COLOR)
+    text = text_cache.render(font, label, TEXT_COLOR) if text_cache else font.render(label, True, TEXT_COLOR)
     screen.blit(text, (rect.centerx - text.get_width() // 2, rect.centery - text.get_height() // 2))
 
 
-def draw_board(screen, font, button_layout, mouse_pos):
-    screen.fill(BG_COLOR)
-    w, h = screen.get_size()
+def _sway_lines(state):
+    snap = state.sway.snapshot() if state.sway else None
+    if snap is None:
+        return ("Sway: waiting for someone on the board",) if state.sway else ()
+    lines = [
+        f"Sway {snap['duration_s']:.0f} s: path {snap['path_cm']:.1f} cm  {snap['velocity_cm_s']:.2f} cm/s",
+        f"RMS {snap['rms_cm']:.2f} cm (ML {snap['rms_ml_cm']:.2f} / AP {snap['rms_ap_cm']:.2f})",
+        f"95% ellipse {snap['ellipse95_cm2']:.2f} cm2  range ML {snap['range_ml_cm']:.1f} / AP {snap['range_ap_cm']:.1f}",
+    ]
+    power = snap["band_power"]
+    if power:
+        ap = [value for key, value in power.items() if key.startswith("ap_")]
+        lines.append("AP power " + " / ".join(f"{value:.3f}" for value in ap) + " cm2 (low/mid/high)")
+    return tuple(lines)
+
+
+def _stats_lines(states):
+    per_board = (remote_stats or stats_snapshot())["boards"]
+    lines = []
+    for state in states:
+        snap = per_board.get(state.label)
+        if not snap:
+            continue
+        lat = snap["latency"]
+        prefix = f"{state.label}: " if len(states) > 1 else ""
+        lines += [
+            f"{prefix}in {snap['input_hz']:.0f} Hz  out {snap['output_hz']:.0f} Hz",
+            f"read->emit p50 {lat['read_to_emit']['p50_us']:.0f} us  p99 {lat['read_to_emit']['p99_us']:.0f} us",
+            f"decode/filter/emit p99 {lat['decode']['p99_us']:.0f}/{lat['filter']['p99_us']:.0f}/"
+            f"{lat['emit']['p99_us']:.0f} us",
+            f"dropped {snap['dropped']}  reconnects {snap['reconnects']}  vJoy reinits {snap['vjoy_reinits']}",
+        ]
+    return tuple(lines)
+
+
+def _board_rects(w, h, count):
+    """Screen rectangle of each board: centered when alone, side by side otherwise."""
+    if count == 1:
+        return [pygame.Rect(w // 4, h // 4, w // 2, h // 2)]
+    gap = 16
+    left, width = w // 16, w - w // 8
+    board_w = (width - gap * (count - 1)) // count
+    return [pygame.Rect(left + i * (board_w + gap), h // 4, board_w, h // 2) for i in range(count)]
+
+
+class _BoardRenderer:
+    """Draws the visualizer as a cached static layer plus the dirty rectangles of changed readouts."""
+
+    def __init__(self):
+        self.text = _TextCache()
+        self.static = None
+        self.static_key = None
+        self.drawn = {}  # element name -> (content key, rect)
+
+    def _build_static(self, screen, font, button_layout, mouse_pos, count, selected):
+        w, h = screen.get_size()
+        static = pygame.Surface((w, h)).convert()
+        static.fill(BG_COLOR)
+        for i, rect in enumerate(_board_rects(w, h, count)):
+            pygame.draw.rect(static, BOARD_COLOR, rect, border_radius=20)
+            if count > 1 and i == selected:
+                pygame.draw.rect(static, BTN_COLOR_ACTIVE, rect.inflate(8, 8), width=3, border_radius=24)
+        for btn in button_layout:
+            hover = btn["rect"].collidepoint(mouse_pos)
+            active = btn.get("active", False)
+            _draw_button(static, font, btn["label"], btn["rect"], active=active, hover=hover, text_cache=self.text)
+        self.static = static
+
+    def _elements(self, screen, font, show_stats, states, selected):
+        """Describe every dynamic element as name -> (content key, rect, draw args)."""
+        w, h = screen.get_size()
+        elements = {}
+        for board_rect, state in zip(_board_rects(w, h, len(states)), states):
+            self._board_elements(elements, font, board_rect, state.frame)
+
+        frame = states[selected].frame
+        # Once the weight has settled, show the locked-in value instead of the filtered one.
+        total_weight = frame.settled or frame.total
+        ounces = total_weight * 16.0
+        text = f"Total: {total_weight:.2f} Lbs / {ounces:.1f} oz   Mode: {'Exact' if exact_mode else 'Damped'}"
+        if len(states) > 1:
+            text = f"{states[selected].label}  {text}"
+        stable = "   Stable" if frame.settled else ""
+        text_w, text_h = self.text.size(font, text, TEXT_COLOR)
+        stable_w = self.text.size(font, stable, STABLE_COLOR)[0] if stable else 0
+        rect = pygame.Rect(w // 2 - (text_w + stable_w) // 2, h // 4 + h // 2 + 10, text_w, text_h)
+        elements["total"] = (text, rect, ("text", text, rect.topleft))
+        if stable:
+            rect = pygame.Rect(rect.right, rect.top, stable_w, text_h)
+            elements["stable"] = (stable, rect, ("text", stable, rect.topleft, STABLE_COLOR))
+
+        if show_stats:
+            lines = _stats_lines(states)
+            y = 8
+            for n, line in enumerate(lines):
+                line_w, line_h = self.text.size(font, line, TEXT_COLOR)
+                rect = pygame.Rect(8, y, line_w, line_h)
+                elements[f"stats{n}"] = (line, rect, ("text", line, rect.topleft))
+                y += line_h
+
+        # Sway metrics of the selected board, top right
+        y = 8
+        for n, line in enumerate(_sway_lines(states[selected])):
+            line_w, line_h = self.text.size(font, line, TEXT_COLOR)
+            rect = pygame.Rect(w - 8 - line_w, y, line_w, line_h)
+            elements[f"sway{n}"] = (line, rect, ("text", line, rect.topleft))
+            y += line_h
+        return elements
+
+    def _board_elements(self, elements, font, board_rect, frame):
+        """Pads and CoP dot of one board; ``frame`` is one consistent snapshot."""
+        sensor_positions = [
+            (board_rect.left + PAD_RADIUS, board_rect.top + PAD_RADIUS),  # TL
+            (board_rect.right - PAD_RADIUS, board_rect.top + PAD_RADIUS),  # TR
+            (board_rect.left + PAD_RADIUS, board_rect.bottom - PAD_RADIUS),  # BL
+            (board_rect.right - PAD_RADIUS, board_rect.bottom - PAD_RADIUS),  # BR
+        ]
+        adjusted = frame.weights
+        max_val = max(max(adjusted), 1.0)
+        prefix = f"b{frame.board}"
+
+        for i, pos in enumerate(sensor_positions):
+            intensity = max(min(255, int(255 * (adjusted[i] / max_val))), 0)
+            base = PAD_BASE_COLOR
+            color = (
+                min(255, base[0] + intensity // 3),
+                min(255, base[1] + intensity // 4),
+                min(255, base[2] + intensity // 5),
+            )
+            label = f"{adjusted[i]:.2f} lb"
+            label_pos = (pos[0] - 28, pos[1] - 10)
+            label_w, label_h = self.text.size(font, label, (10, 10, 10))
+            rect = pygame.Rect(pos[0] - PAD_RADIUS, pos[1] - PAD_RADIUS, 2 * PAD_RADIUS, 2 * PAD_RADIUS)
+            rect.union_ip(pygame.Rect(label_pos, (label_w, label_h)))
+            elements[f"{prefix}pad{i}"] = ((color, label), rect, ("pad", pos, color, label, label_pos))
+
+        if frame.total > 0:
+            # Screen y grows downward, CoP y grows toward the top of the board
+            cx = board_rect.centerx + int((board_rect.width // 2 - 20) * frame.cop_x)
+            cy = board_rect.centery - int((board_rect.height // 2 - 20) * frame.cop_y)
+            rect = pygame.Rect(cx - DOT_RADIUS, cy - DOT_RADIUS, 2 * DOT_RADIUS, 2 * DOT_RADIUS)
+            elements[f"{prefix}dot"] = ((cx, cy), rect, ("dot", (cx, cy)))
+
+    def _draw_element(self, screen, font, args):
+        kind = args[0]
+        if kind == "pad":
+            _, pos, color, label, label_pos = args
+            pygame.draw.circle(screen, color, pos, PAD_RADIUS)
+            self.text.blit(screen, font, label, (10, 10, 10), label_pos)
+        elif kind == "dot":
+            pygame.draw.circle(screen, DOT_COLOR, args[1], DOT_RADIUS)
+        else:
+            self.text.blit(screen, font, args[1], args[3] if len(args) > 3 else TEXT_COLOR, args[2])
+
+    def draw(self, screen, font, button_layout, mouse_pos, show_stats=False, selected=0):
+        """Update the display; returns False when nothing on screen changed."""
+        w, h = screen.get_size()
+        states = boards
+        selected = min(selected, len(states) - 1)
+        static_key = (
+            w,
+            h,
+            id(screen),
+            len(states),
+            selected,
+            tuple(
+                (btn["label"], btn.get("active", False), btn["rect"].collidepoint(mouse_pos))
+                for btn in button_layout
+            ),
+        )
+        full = static_key != self.static_key
+        if full:
+            self._build_static(screen, font, button_layout, mouse_pos, len(states), selected)
+            self.static_key = static_key
+
+        elements = self._elements(screen, font, show_stats, states, selected)
+        if full:
+            dirty = [screen.get_rect()]
+        else:
+            dirty = []
+            for name, (key, rect, _) in elements.items():
+                old = self.drawn.get(name)
+                if old is None:
+                    dirty.append(rect)
+                elif old[0] != key:
+                    dirty.append(old[1])
+                    dirty.append(rect)
+            dirty.extend(rect for name, (_, rect) in self.drawn.items() if name not in elements)
+        self.drawn = {name: (key, rect) for name, (key, rect, _) in elements.items()}
+        if not dirty:
+            return False
+
+        # Restore the static layer under each dirty rect, then redraw whatever
+        # overlaps it in z-order (pads, dot, text), clipped to that rect.
+        for area in dirty:
+            screen.set_clip(area)
+            screen.blit(self.static, area, area)
+            for _, rect, args in elements.values():
+                if rect.colliderect(area):
+                    self._draw_element(screen, font, args)
+        screen.set_clip(None)
+
+        if full:
+            pygame.display.flip()
+        else:
+            pygame.display.update(dirty)
+        return True
 
-    board_rect = pygame.Rect(w // 4, h // 4, w // 2, h // 2)
-    pygame.draw.rect(screen, BOARD_COLOR, board_rect, border_radius=20)
 
-    pad_radius = 30
-    sensor_positions = [
-        (board_rect.left + pad_radius, board_rect.top + pad_radius),  # TL
-        (board_rect.right - pad_radius, board_rect.top + pad_radius),  # TR
-        (board_rect.left + pad_radius, board_rect.bottom - pad_radius),  # BL
-        (board_rect.right - pad_radius, board_rect.bottom - pad_radius),  # BR
-    ]
+_renderer = _BoardRenderer()
 
-    adjusted = _get_adjusted_data()
-    max_val = max(max(adjusted), 1.0)
-    total_weight = sum(adjusted)
-
-    for i, pos in enumerate(sensor_positions):
-        intensity = max(min(255, int(255 * (adjusted[i] / max_val))), 0)
-        base = PAD_BASE_COLOR
-        color = (
-            min(255, base[0] + intensity // 3),
-            min(255, base[1] + intensity // 4),
-            min(255, base[2] + intensity // 5),
-        )
-        pygame.draw.circle(screen, color, pos, pad_radius)
-        label = font.render(f"{adjusted[i]:.2f} lb", True, (10, 10, 10))
-        screen.blit(label, (pos[0] - 28, pos[1] - 10))
-
-    if total_weight > 0:
-        top = adjusted[0] + adjusted[1]
-        bottom = adjusted[2] + adjusted[3]
-        left = adjusted[0] + adjusted[2]
-        right = adjusted[1] + adjusted[3]
-
-        x = (right - left) / total_weight
-        y = (bottom - top) / total_weight
-
-        cx = board_rect.centerx + int((board_rect.width // 2 - 20) * x)
-        cy = board_rect.centery + int((board_rect.height // 2 - 20) * y)
-        pygame.draw.circle(screen, DOT_COLOR, (cx, cy), 10)
-
-    ounces = total_weight * 16.0
-    weight = font.render(
-        f"Total: {total_weight:.2f} Lbs / {ounces:.1f} oz   Mode: {'Exact' if exact_mode else 'Damped'}",
-        True,
-        TEXT_COLOR,
+
+def draw_board(screen, font, button_layout, mouse_pos, show_stats=False, selected=0):
+    return _renderer.draw(screen, font, button_layout, mouse_pos, show_stats, selected)
+
+
+### --- Main ---
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Wii Balance Board visualizer and virtual joystick")
+    parser.add_argument(
+        "--backend",
+        choices=sorted(INPUT_BACKENDS),
+        default=default_backend_name(),
+        help="board input (default: evdev on Linux, hidapi on Windows)",
+    )
+    parser.add_argument(
+        "--output",
+        choices=sorted(OUTPUT_SINKS),
+        default=default_output_name(),
+        help="virtual joystick output (default: uinput on Linux, vjoy on Windows)",
+    )
+    parser.add_argument(
+        "--output-rate",
+        type=float,
+        metavar="HZ",
+        help="coalesce joystick updates to at most HZ (default: one per board sample)",
+    )
+    parser.add_argument(
+        "--mapping",
+        metavar="PATH",
+        help="JSON file mapping joystick axes to board values with deadzone/expo/saturation/invert curves",
+    )
+    parser.add_argument(
+        "--sensor-axes",
+        action="store_true",
+        help="also expose each sensor's share of the weight (RX/RY/Z/RZ) and the total weight (throttle) as axes",
+    )
+    parser.add_argument(
+        "--stream",
+        metavar="URL",
+        action="append",
+        default=[],
+        help="also publish every frame to udp://HOST:PORT or osc://HOST:PORT (repeatable; multicast works)",
+    )
+    parser.add_argument(
+        "--shm",
+        metavar="PATH",
+        nargs="?",
+        const=default_ring_path(),
+        help=f"also publish frames to a shared-memory ring for local readers (default path: {default_ring_path()})",
+    )
+    parser.add_argument(
+        "--filter",
+        choices=sorted(FILTER_PROFILES),
+        default=filter_profile[False],
+        help="smoothing profile in damped mode (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--exact-filter",
+        choices=sorted(FILTER_PROFILES),
+        default=filter_profile[True],
+        help="smoothing profile in exact mode (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--boards",
+        type=int,
+        default=1,
+        metavar="N",
+        help="serve N boards, each with its own joystick (default: %(default)s)",
     )
-    screen.blit(weight, (w // 2 - weight.get_width() // 2, board_rect.bottom + 10))
+    parser.add_argument("--rate", type=float, default=100.0, help="synthetic board sample rate in Hz")
+    parser.add_argument(
+        "--record",
+        metavar="PATH",
+        help="capture raw board samples to PATH (board N > 1 writes PATH with -N before the extension)",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="PATH",
+        action="append",
+        help="replay a capture instead of reading a board; repeat to replay several boards",
+    )
+    parser.add_argument("--max-speed", action="store_true", help="replay as fast as possible")
+    parser.add_argument(
+        "--calibration-cache",
+        metavar="PATH",
+        help=f"where hidapi boards cache their calibration (default: {default_cache_path()})",
+    )
+    parser.add_argument(
+        "--no-calibration-cache",
+        action="store_true",
+        help="always read calibration from the board",
+    )
+    parser.add_argument("--stats-port", type=int, metavar="PORT", help="serve reader stats as JSON on localhost:PORT")
+    parser.add_argument("--stats", action="store_true", help="show the stats overlay (toggle with F3)")
+    parser.add_argument(
+        "--gestures",
+        action="store_true",
+        help="detect step on/off, jump, squat, leans and weight shifts as extra joystick buttons",
+    )
+    parser.add_argument(
+        "--gesture",
+        metavar="NAME=VALUE",
+        action="append",
+        default=[],
+        help="override a gesture threshold, e.g. lean_on=0.5 (implies --gestures)",
+    )
+    parser.add_argument(
+        "--sway",
+        type=float,
+        metavar="SECONDS",
+        nargs="?",
+        const=30.0,
+        help="compute postural sway metrics over a sliding window (default window: 30 s)",
+    )
+    parser.add_argument(
+        "--reader-process",
+        action="store_true",
+        help="read boards and drive the joystick in a separate process, so drawing never delays output",
+    )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="run only the board reader and joystick output, without the visualizer",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="logging verbosity (default: INFO)",
+    )
+    parser.add_argument("--log-file", metavar="PATH", help="log to PATH instead of stderr")
+    args = parser.parse_args(argv)
+    if not args.replay and args.backend is None:
+        parser.error("no board backend for this platform; pass --backend")
+    if args.boards < 1:
+        parser.error("--boards must be at least 1")
+    try:
+        args.stream = [parse_stream_url(url) for url in args.stream]
+        args.gesture = dict(_parse_setting(item) for item in args.gesture)
+        GestureDetector(**args.gesture)  # validate names early
+        mapping = load_mapping(args.mapping) if args.mapping else dict(DEFAULT_MAPPING)
+        if args.sensor_axes:
+            mapping.update((name, axis) for name, axis in SENSOR_MAPPING.items() if name not in mapping)
+        args.mapping = check_mapping(mapping)
+    except ValueError as e:
+        parser.error(str(e))
+    args.gestures = args.gestures or bool(args.gesture)
+    return args
+
+
+def _parse_setting(item):
+    name, sep, value = item.partition("=")
+    if not sep:
+        raise ValueError(f"expected NAME=VALUE, got {item!r}")
+    return name.strip(), float(value)
+
+
+def make_backends(args):
+    """One input backend per board; each real backend claims a different device."""
+    if args.replay:
+        return [ReplayBackend(path, realtime=not args.max_speed) for path in args.replay]
+    if args.backend == "synthetic":
+        return [SyntheticBackend(args.rate, SimulatedRider(mass_kg=70.0 + 8.0 * i)) for i in range(args.boards)]
+    cache = None if args.no_calibration_cache else CalibrationCache(args.calibration_cache)
+    if args.backend == "synthetic-wiimote":
+        # Emulated boards only use a cache file that was asked for explicitly.
+        cache = cache if args.calibration_cache else None
+        return [synthetic_wiimote_backend(args.rate, i, cache) for i in range(args.boards)]
+    if args.backend == "hidapi":
+        return [HidapiBackend(cache=cache) for _ in range(args.boards)]
+    return [INPUT_BACKENDS[args.backend]() for _ in range(args.boards)]
+
+
+def make_joystick(args, index=0):
+    """Joystick output for board ``index``: its own uinput device or vJoy ID."""
+    if args.output == "uinput":
+        name = "Wii Balance Board HID" + (f" {index + 1}" if index else "")
+        return UinputSink(name, rate_hz=args.output_rate, gestures=args.gestures, mapping=args.mapping)
+    if args.output == "vjoy":
+        return VJoySink(device_id=VJOY_DEVICE_ID + index, rate_hz=args.output_rate, mapping=args.mapping)
+    return OutputSink()
+
+
+def make_sink(args, index=0, state=None):
+    """All outputs of board ``index``: its joystick plus any streams, the shm ring and sway analytics."""
+    sinks = [] if args.output == "none" else [make_joystick(args, index)]
+    targets = {}
+    for scheme, address in args.stream:
+        targets.setdefault(scheme, []).append(address)
+    sinks += [STREAM_SINKS[scheme](addresses) for scheme, addresses in targets.items()]
+    if args.shm:
+        sinks.append(ShmRingSink(_board_path(args.shm, index), board=index))
+    if state is not None and state.sway:
+        sinks.append(state.sway)
+    if len(sinks) == 1:
+        return sinks[0]
+    return MultiSink(sinks) if sinks else OutputSink()
+
+
+def _board_path(path, index):
+    """Per-board variant of a capture path: session.wbb, session-2.wbb, ..."""
+    if not path or index == 0:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}-{index + 1}{ext}"
+
+
+def _run_reader(args, backends, stop, done=None, ready=None):
+    # Sinks are created on the reader thread: vJoy may retry for a while.
+    try:
+        sessions = [
+            BoardSession(backend, make_sink(args, i, boards[i]), boards[i], _board_path(args.record, i))
+            for i, backend in enumerate(backends)
+        ]
+        if ready:
+            ready.set()
+        serve_boards(sessions, stop)
+    except Exception:
+        log.exception("Board reader stopped")
+    finally:
+        if done:
+            done.set()
+
+
+def start_reader_thread(args, stop, done=None, ready=None):
+    global boards
+    backends = make_backends(args)
+    boards = [BoardState(i) for i in range(len(backends))]
+    for state in boards:
+        if args.sway:
+            state.sway = SwayAnalyzer(args.sway)
+        if args.gestures:
+            state.gestures = GestureDetector(**args.gesture)
+    thread = threading.Thread(
+        target=_run_reader,
+        args=(args, backends, stop, done, ready),
+        name="board-reader",
+        daemon=True,
+    )
+    thread.start()
+    return thread
 
-    # Draw buttons
-    for btn in button_layout:
-        hover = btn["rect"].collidepoint(mouse_pos)
-        active = btn.get("active", False)
-        _draw_button(screen, font, btn["label"], btn["rect"], active=active, hover=hover)
 
-    pygame.display.flip()
+CONTROL_POLL = 0.1  # reader process: how often to check for the UI's commands and its own shutdown
+CONTROL_STATS_INTERVAL = 0.5  # reader process: how often to push stats to the UI
 
 
-### --- Main ---
-def main():
+def apply_command(name, *params):
+    """Apply a UI control command: ("tare", board), ("clear", board),
+    ("corner", board, corner, delta) or ("exact", on)."""
     global exact_mode
+    if name == "exact":
+        exact_mode = params[0]
+        log.info(f"Exact mode {'ON' if exact_mode else 'OFF'}.")
+        return
+    state = boards[params[0]]
+    if name == "tare":
+        state.tare = state.frame.raw
+        log.info(f"{state.label}: tare set to current readings.")
+    elif name == "clear":
+        state.tare = (0.0, 0.0, 0.0, 0.0)
+        log.info(f"{state.label}: tare reset to zero.")
+    elif name == "corner":
+        idx, delta = params[1:]
+        tare = list(state.tare)
+        tare[idx] = max(0.0, tare[idx] + delta)
+        state.tare = tuple(tare)
+        log.info(f"{state.label}: tare {SENSOR_NAMES[idx]} now {state.tare[idx]:.2f} lb")
+    else:
+        raise ValueError(f"unknown command {name!r}")
+
+
+def _reader_process_main(args, conn):
+    """Entry point of the reader process: serve the boards, obey the UI's pipe."""
+    setup_logging(args.log_level, args.log_file)
+    filter_profile.update({False: args.filter, True: args.exact_filter})
+    stop, done, ready = threading.Event(), threading.Event(), threading.Event()
+
+    def request_stop(signum, frame):
+        stop.set()
+        done.set()
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C also reaches the UI, whose exit stops us
+    signal.signal(signal.SIGTERM, request_stop)  # sent for us when the UI exits
+    if args.stats_port is not None:
+        start_stats_server(args.stats_port)
+    reader = start_reader_thread(args, stop, done, ready)
+    announced = False
+    push_stats = bool(args.sway)
+    next_stats = 0.0
+    try:
+        while not done.is_set():
+            if not announced and ready.is_set():
+                conn.send(("ready",))
+                announced = True
+            if conn.poll(CONTROL_POLL):
+                message = conn.recv()
+                if message[0] == "stop":
+                    break
+                if message[0] == "stats":
+                    push_stats = message[1] or bool(args.sway)
+                else:
+                    apply_command(*message)
+            now = time.monotonic()
+            if push_stats and now >= next_stats:
+                conn.send(("stats", stats_snapshot()))
+                next_stats = now + CONTROL_STATS_INTERVAL
+    except (EOFError, OSError):
+        pass  # the UI process went away
+    finally:
+        stop.set()
+        reader.join(timeout=3.0)
+
+
+class _RemoteSway:
+    """Stands in for a SwayAnalyzer that runs in the reader process."""
+
+    def __init__(self, label):
+        self.label = label
+
+    def snapshot(self):
+        return (remote_stats or {}).get("sway", {}).get(self.label)
+
+
+class ReaderProcess:
+    """Board reading, filtering and joystick output in a separate process.
+
+    The visualizer then never holds the GIL the reader needs: commands go
+    over a pipe (see apply_command), and frames come back through each
+    board's shared-memory ring. Without --shm the rings are private
+    temporary files, removed again by close().
+    """
+
+    def __init__(self, args):
+        import multiprocessing
+
+        global boards
+        count = len(args.replay) if args.replay else args.boards
+        self.private = not args.shm
+        if self.private:
+            args.shm = os.path.join(os.path.dirname(default_ring_path()), f"wiibalance-{os.getpid()}.ring")
+        self.paths = [_board_path(args.shm, i) for i in range(count)]
+        self.rings = []
+        boards = [BoardState(i) for i in range(count)]
+        for state in boards:
+            if args.sway:
+                state.sway = _RemoteSway(state.label)
+
+        # spawn on every platform: forking a process that already runs threads is unsafe.
+        context = multiprocessing.get_context("spawn")
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_reader_process_main, args=(args, child_conn), name="board-reader", daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        log.info(f"Board reader running in process {self.process.pid}.")
+
+    def send(self, *message):
+        try:
+            self.conn.send(message)
+        except OSError:
+            log.warning(f"Board reader process has exited; {message[0]} ignored.")
+
+    def poll(self):
+        """Handle messages from the reader and load every board's newest frame."""
+        global remote_stats
+        try:
+            while self.conn.poll():
+                message = self.conn.recv()
+                if message[0] == "ready":
+                    self.rings = [RingReader(path) for path in self.paths]
+                elif message[0] == "stats":
+                    remote_stats = message[1]
+        except (EOFError, OSError):
+            pass  # reader finished; keep showing the last frames
+        for state, ring in zip(boards, self.rings):
+            frame = ring.latest()
+            if frame is not None:
+                state.frame = frame
+
+    def close(self):
+        self.send("stop")
+        self.process.join(timeout=3.0)
+        if self.process.is_alive():
+            log.warning("Board reader process did not stop in time; terminating it.")
+            self.process.terminate()
+        for ring in self.rings:
+            ring.close()
+        if self.private:
+            for path in self.paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+def run_headless(args):
+    """Joystick bridge without a display; SIGINT/SIGTERM shut it down cleanly."""
+    stop = threading.Event()
+    done = threading.Event()
+
+    def request_stop(signum, frame):
+        log.info(f"Received {signal.Signals(signum).name}, shutting down.")
+        stop.set()
+        done.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    if args.stats_port is not None:
+        start_stats_server(args.stats_port)
+    reader = start_reader_thread(args, stop, done)
+    # Wait on an Event with a timeout so signal handlers get to run.
+    while not done.wait(1.0):
+        pass
+    stop.set()
+    reader.join(timeout=3.0)
+    if reader.is_alive():
+        log.warning("Board reader did not stop in time; exiting anyway.")
+
+
+def run_visualizer(args):
+    global exact_mode
+    pygame = _import_pygame()
     pygame.init()
     min_w, min_h = 600, 600
     screen = pygame.display.set_mode((700, 650), pygame.RESIZABLE)
@@ -518,47 +3606,108 @@ def main():
         {"label": "BR -", "action": "corner", "corner": 3, "delta": -TARE_STEP},
     ]
 
-    reader_thread = threading.Thread(target=start_board_reader, daemon=True)
-    reader_thread.start()
+    show_stats = args.stats
+    selected = 0  # board that Tare and the corner buttons act on
+
+    if args.reader_process:
+        reader = ReaderProcess(args)
+        atexit.register(reader.close)  # also on Ctrl+C and sys.exit(): stops the child, removes private rings
+        control = reader.send
+        reader.send("stats", show_stats)
+    else:
+        if args.stats_port is not None:
+            start_stats_server(args.stats_port)
+        reader = None
+        control = apply_command
+        start_reader_thread(args, threading.Event())
+
+    def layout_buttons():
+        layout = _layout_buttons(*screen.get_size(), font, button_specs)
+        # Mark active state for exact mode button
+        for btn in layout:
+            if btn["action"] == "exact":
+                btn["active"] = exact_mode
+        return layout
 
+    button_layout = layout_buttons()
     clock = pygame.time.Clock()
+    idle_frames = 0
     while True:
+        if idle_frames >= IDLE_AFTER_FRAMES:
+            # Nothing changed for a while: sleep until input arrives or the
+            # next idle check instead of redrawing at full rate.
+            event = pygame.event.wait(IDLE_WAIT_MS)
+            events = [event] + pygame.event.get() if event.type != pygame.NOEVENT else []
+        else:
+            events = pygame.event.get()
+        if reader:
+            reader.poll()
         mouse_pos = pygame.mouse.get_pos()
-        button_layout = _layout_buttons(*screen.get_size(), font, button_specs)
-        # Mark active state for exact mode button
-        for btn in button_layout:
-            if btn["action"] == "exact":
-                btn["active"] = exact_mode
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                show_stats = not show_stats
+                if reader:
+                    reader.send("stats", show_stats)
+            if event.type == pygame.KEYDOWN and pygame.K_1 <= event.key < pygame.K_1 + min(len(boards), 9):
+                selected = event.key - pygame.K_1
             if event.type == pygame.VIDEORESIZE:
                 new_w = max(min_w, event.w)
                 new_h = max(min_h, event.h)
                 screen = pygame.display.set_mode((new_w, new_h), pygame.RESIZABLE)
+                button_layout = layout_buttons()
             if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                for i, rect in enumerate(_board_rects(*screen.get_size(), len(boards))):
+                    if rect.collidepoint(event.pos):
+                        selected = i
                 for btn in button_layout:
                     if btn["rect"].collidepoint(event.pos):
-                        if btn["action"] == "tare":
-                            for i in range(4):
-                                tare_offset[i] = raw_data[i]
-                            print("Tare set to current readings.")
-                        elif btn["action"] == "clear":
-                            for i in range(4):
-                                tare_offset[i] = 0.0
-                            print("Tare reset to zero.")
+                        if btn["action"] in ("tare", "clear"):
+                            control(btn["action"], selected)
                         elif btn["action"] == "exact":
                             exact_mode = not exact_mode
-                            print(f"Exact mode {'ON' if exact_mode else 'OFF'}.")
+                            control("exact", exact_mode)
+                            button_layout = layout_buttons()
                         elif btn["action"] == "corner":
-                            idx = btn["corner"]
-                            tare_offset[idx] = max(0.0, tare_offset[idx] + btn["delta"])
-                            label = ["TL", "TR", "BL", "BR"][idx]
-                            print(f"Tare {label} now {tare_offset[idx]:.2f} lb")
+                            control("corner", selected, btn["corner"], btn["delta"])
                         break
-        draw_board(screen, font, button_layout, mouse_pos)
-        clock.tick(30)
+        if draw_board(screen, font, button_layout, mouse_pos, show_stats, selected):
+            idle_frames = 0
+        else:
+            idle_frames += 1
+        if idle_frames < IDLE_AFTER_FRAMES:
+            clock.tick(ACTIVE_FPS)
+
+
+def setup_logging(level, path=None):
+    """Log through a queue so the reader thread never blocks on terminal or file I/O."""
+    import logging.handlers
+    import queue
+
+    handler = logging.FileHandler(path) if path else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    listener.start()
+    atexit.register(listener.stop)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))  # final formatting happens in the listener
+    logging.basicConfig(level=getattr(logging, level), handlers=[queue_handler])
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging(args.log_level, args.log_file)
+    filter_profile.update({False: args.filter, True: args.exact_filter})
+    if args.headless:
+        run_headless(args)
+    else:
+        try:
+            run_visualizer(args)
+        except KeyboardInterrupt:
+            log.info("Interrupted, shutting down.")
 
 
 if __name__ == "__main__":